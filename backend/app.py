@@ -1,6 +1,12 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, UploadFile, File, Header, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from checker import TitleChecker
+from typing import Optional
+from checker import TitleChecker, REGISTRY_DB, BUNDLE_WATCH_SECONDS
+from index_bundle import activate_bundle, list_bundles, read_manifest
+from merkle_batcher import BatchStore
+from bulk_jobs import BulkJob, JobBusy
+from live_session import LiveSession
 from fastapi.middleware.cors import CORSMiddleware
 import time
 import threading
@@ -34,18 +40,30 @@ app.add_middleware(
 print("Loading core TitleChecker Engine...")
 t0 = time.time()
 engine = TitleChecker()
-print(f"Engine loaded in {time.time() - t0:.2f}s")
+print(f"Engine loaded in {time.time() - t0:.2f}s (index bundle {engine.bundle.version})")
+# Pick up bundles activated by build_index.py or another worker without a restart
+if BUNDLE_WATCH_SECONDS > 0:
+    engine.watch_bundles(BUNDLE_WATCH_SECONDS)
+
+# Shared secret for the /admin endpoints; they are disabled when unset
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+# Read side of the Merkle batches committed on-chain by merkle_batcher.py
+batch_store = BatchStore(REGISTRY_DB)
 
 class VerificationRequest(BaseModel):
     title: str
     hindi_title: str = ""
+    # Optional partition filters for the semantic stage, e.g. state="UP", periodity="D"
+    state: Optional[str] = None
+    city: Optional[str] = None
+    periodity: Optional[str] = None
 
 @app.get("/")
 def health_check():
     return {"status": "ok", "message": "PRGI Verification Engine Online", "index_size": len(engine.metadata)}
 
-@app.post("/verify")
-def verify_title(req: VerificationRequest, request: Request):
+def enforce_rate_limit(request):
     # Abuse Detection (Rate Limiting)
     # request.client may be None when running behind certain reverse proxies.
     client_ip = request.client.host if request.client else "unknown"
@@ -69,24 +87,169 @@ def verify_title(req: VerificationRequest, request: Request):
 
         RATE_LIMIT_STORE[client_ip].append(current_time)
 
+def add_audit_lineage(result: dict, elapsed: float):
+    result["inference_time_seconds"] = round(elapsed, 4)
+
+    # Audit Lineage Metadata
+    result["model_version"] = "paraphrase-multilingual-MiniLM-L12-v2"
+    result["ruleset_version"] = "v1.4.0 (PRGI Guidelines)"
+    # index_version / index_timestamp are set by the engine from the bundle the request used
+    return result
+
+@app.post("/verify")
+def verify_title(req: VerificationRequest, request: Request):
+    enforce_rate_limit(request)
+
     if not req.title:
         raise HTTPException(status_code=400, detail="Title Name must be provided.")
         
     start_time = time.time()
     
     # Run the validation pipeline
-    result = engine.verify(req.title.strip(), req.hindi_title.strip())
-    
-    elapsed = time.time() - start_time
-    result["inference_time_seconds"] = round(elapsed, 4)
-    
-    # Audit Lineage Metadata
-    result["model_version"] = "paraphrase-multilingual-MiniLM-L12-v2"
-    result["ruleset_version"] = "v1.4.0 (PRGI Guidelines)"
-    result["index_timestamp"] = "2026-02-26T00:00:00Z"
+    filters = {"state": req.state, "city": req.city, "periodity": req.periodity}
+    try:
+        result = engine.verify(req.title.strip(), req.hindi_title.strip(), filters=filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
+    return add_audit_lineage(result, time.time() - start_time)
+
+def verify_rows(rows, sources=None):
+    """Bulk counterpart of /verify: one encoder call per batch, /verify-shaped results."""
+    start_time = time.time()
+    results = engine.verify_batch(rows, sources)
+    per_row = (time.time() - start_time) / len(rows)
+    return [add_audit_lineage(result, per_row) for result in results]
+
+def stream_job(job: BulkJob, after: int):
+    try:
+        job.acquire()
+    except JobBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return StreamingResponse(
+        job.stream(verify_rows, after),
+        media_type="application/x-ndjson",
+        headers={"X-Job-Id": job.job_id},
+    )
+
+@app.post("/verify/upload")
+def verify_upload(request: Request, file: UploadFile = File(...)):
+    """
+    Bulk verification of a CSV / XLSX with a 'Title Name' (and optional 'Hindi Title') column.
+    Streams one NDJSON line per row plus progress events; resume with GET /verify/upload/{job_id}.
+    """
+    enforce_rate_limit(request)
+    try:
+        job = BulkJob.create(file.file, file.filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return stream_job(job, after=0)
+
+@app.get("/verify/upload/{job_id}")
+def resume_upload(job_id: str, request: Request, after: int = 0):
+    """Replays results for rows > `after`, then continues processing where the job stopped."""
+    enforce_rate_limit(request)
+    job = BulkJob.open(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown bulk verification job.")
+    return stream_job(job, after)
+
+@app.websocket("/verify/live")
+async def verify_live(websocket: WebSocket):
+    """
+    As-you-type verification: one JSON message per edit, answered with a Stage A/B verdict
+    and then the full result for the newest input only. See live_session.py for the protocol.
+    """
+    # A session counts as one request; it never runs more than one verification at a time
+    try:
+        enforce_rate_limit(websocket)
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    session = LiveSession(engine, lineage=add_audit_lineage)
+    try:
+        await session.serve(websocket.receive_text, websocket.send_json)
+    except WebSocketDisconnect:
+        pass
+    print(f"Live session closed: {session.stats}")
+
+@app.get("/titles/proof")
+def title_inclusion_proof(title: str):
+    """
+    Merkle inclusion proof for an approved title, checkable on-chain with
+    TitleRegistry.isBatchedTitle(title_hash, root, proof).
+    """
+    proof = batch_store.proof_for(title)
+    if proof is None:
+        raise HTTPException(status_code=404, detail="Title has not been approved.")
+    if proof["status"] == "pending":
+        # Approved, but the batcher has not committed its batch yet
+        return JSONResponse(status_code=202, content=proof)
+    return proof
+
+@app.get("/titles/complete")
+def complete_titles(q: str = "", limit: int = 10):
+    """Registered titles starting with `q` (English or Hindi), for type-ahead while typing a new title."""
+    return {"query": q, "matches": engine.complete_titles(q, max(1, min(limit, 50)))}
+
+@app.get("/titles/clusters")
+def title_clusters():
+    """Degree and cluster statistics of the near-duplicate graph, for auditing the registry."""
+    graph = engine.similar_graph
+    if graph is None:
+        raise HTTPException(status_code=503, detail="Near-duplicate graph not built. Run build_index.py.")
+    return graph.stats
+
+@app.get("/titles/{title_code}/similar")
+def similar_titles(title_code: str, limit: int = 20):
+    """Existing titles that conflict with a registered title, from the precomputed near-duplicate graph."""
+    if engine.similar_graph is None:
+        raise HTTPException(status_code=503, detail="Near-duplicate graph not built. Run build_index.py.")
+    result = engine.similar_titles(title_code, max(1, min(limit, 100)))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Unknown Title-Code.")
     return result
 
+def require_admin(token: Optional[str]):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=503, detail="Admin API disabled. Set ADMIN_TOKEN to enable it.")
+    if token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+def bundle_summary(version: str):
+    manifest = read_manifest(version)
+    return {key: manifest.get(key) for key in ("version", "built_at", "model", "vector_storage", "rows")}
+
+@app.get("/admin/bundle")
+def active_bundle(x_admin_token: Optional[str] = Header(None)):
+    """Index bundle serving requests in this worker, plus the bundles available to switch to."""
+    require_admin(x_admin_token)
+    bundle = engine.bundle
+    return {
+        "active": {"version": bundle.version, "built_at": bundle.built_at, "titles": len(bundle.metadata)},
+        "available": [bundle_summary(version) for version in list_bundles()],
+    }
+
+@app.post("/admin/bundle/reload")
+def reload_bundle(version: Optional[str] = None, x_admin_token: Optional[str] = Header(None)):
+    """
+    Activates `version` (default: re-reads INDEX_DIR/CURRENT) and swaps it in. Requests in
+    flight finish on the previous bundle. Other workers follow through their CURRENT watcher.
+    """
+    require_admin(x_admin_token)
+    if version and version not in list_bundles():
+        raise HTTPException(status_code=404, detail="Unknown index bundle.")
+    previous = engine.bundle.version
+    try:
+        if version:
+            activate_bundle(version)
+        changed = engine.reload_bundle(version)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    bundle = engine.bundle
+    return {"previous": previous, "version": bundle.version, "built_at": bundle.built_at, "changed": changed}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,85 @@
+import os
+import time
+import faiss
+import numpy as np
+import pandas as pd
+from sentence_transformers import SentenceTransformer
+from build_index import DATASET_PATH, MODEL_NAME, create_vector_index
+from checker import RERANK_K, rerank_exact
+
+STORAGES = os.environ.get("BENCH_STORAGES", "flat,fp16,int8,pq").split(",")
+N_QUERIES = int(os.environ.get("BENCH_QUERIES", "1000"))
+K = 5
+
+
+def recall_at_k(database, queries, found, true_scores):
+    """
+    Share of returned ids whose exact score reaches the true k-th best score. Counting by
+    score rather than id keeps titles that tie with a true neighbour (duplicates) correct.
+    """
+    exact = np.einsum('qkd,qd->qk', database[found], queries)
+    return np.mean(exact >= true_scores[:, -1:] - 1e-6)
+
+
+def run_benchmark():
+    print("=========================================")
+    print(" VECTOR STORAGE: MEMORY vs RECALL@5")
+    print("=========================================\n")
+
+    df = pd.read_csv(DATASET_PATH, encoding='utf-8-sig')
+    titles = df['Title Name'].fillna('').astype(str).str.strip().str.lower()
+    texts = (titles + " | " + df['Hindi Title'].fillna('').astype(str).str.strip())[titles != ""].tolist()
+
+    print(f"Encoding {len(texts)} titles...")
+    vectors = SentenceTransformer(MODEL_NAME).encode(texts, convert_to_numpy=True).astype('float32')
+    faiss.normalize_L2(vectors)
+
+    # Held-out queries: their own rows are removed from the database, so the nearest
+    # neighbours are other titles, as for a new application
+    rng = np.random.default_rng(0)
+    held_out = np.zeros(len(vectors), dtype=bool)
+    held_out[rng.choice(len(vectors), min(N_QUERIES, len(vectors) // 10), replace=False)] = True
+    queries, database = vectors[held_out], np.ascontiguousarray(vectors[~held_out])
+
+    flat = faiss.IndexFlatIP(database.shape[1])
+    flat.add(database)
+    true_scores, truth = flat.search(queries, K)
+    print(f"{len(database)} indexed, {len(queries)} queries, re-rank shortlist RERANK_K={RERANK_K}\n")
+
+    print(f"{'storage':>7} | {'bytes/vec':>9} | {'index MB':>8} | {'recall@5':>8} | {'reranked':>8} | "
+          f"{'max |score diff|':>16} | {'ms/query':>8}")
+    print("-" * 84)
+    for storage in STORAGES:
+        index = create_vector_index(database, storage)
+        index_bytes = faiss.serialize_index(index).size
+
+        _, first_pass = index.search(queries, K)
+        if storage == "flat":
+            found, scores = first_pass, index.search(queries, K)[0]
+            t0 = time.perf_counter()
+            for q in queries:
+                index.search(q[None, :], K)
+        else:
+            _, shortlist = index.search(queries, max(K, RERANK_K))
+            reranked = [rerank_exact(database, q, ids, K) for q, ids in zip(queries, shortlist)]
+            scores = np.array([s for s, _ in reranked])
+            found = np.array([i for _, i in reranked])
+            t0 = time.perf_counter()
+            for q in queries:
+                rerank_exact(database, q, index.search(q[None, :], max(K, RERANK_K))[1][0], K)
+        ms_per_query = (time.perf_counter() - t0) / len(queries) * 1e3
+
+        # Scores only comparable where the same neighbours were returned
+        same = np.all(np.sort(found, axis=1) == np.sort(truth, axis=1), axis=1)
+        diff = np.abs(scores[same] - true_scores[same]).max() * 100 if same.any() else float('nan')
+        print(f"{storage:>7} | {index_bytes / len(database):9.1f} | {index_bytes / 2**20:8.2f} | "
+              f"{recall_at_k(database, queries, first_pass, true_scores):8.4f} | "
+              f"{recall_at_k(database, queries, found, true_scores):8.4f} | "
+              f"{diff:13.6f} pp | {ms_per_query:8.3f}")
+
+    print(f"\nCompressed storages also keep vectors.npy on disk ({database.shape[1] * 4} bytes/vector, "
+          f"memory-mapped and paged in only for shortlisted ids).")
+
+
+if __name__ == "__main__":
+    run_benchmark()
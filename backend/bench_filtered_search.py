@@ -0,0 +1,73 @@
+import os
+import time
+import numpy as np
+from checker import TitleChecker
+
+N_QUERIES = int(os.environ.get("BENCH_QUERIES", "500"))
+K = 5
+
+
+def percentile_ms(samples, p):
+    return np.percentile(samples, p) * 1e3
+
+
+def run_benchmark():
+    print("=========================================")
+    print(" FILTERED vs UNFILTERED STAGE C SEARCH")
+    print("=========================================\n")
+
+    checker = TitleChecker()
+    if checker.index is None or checker.metadata_filters is None:
+        print("Index or filters.npz missing. Run build_index.py first.")
+        return
+    index, filters = checker.index, checker.metadata_filters
+    n = index.ntotal
+
+    # Queries are indexed titles' own vectors, so no encoder time is included
+    rng = np.random.default_rng(0)
+    rows = np.sort(rng.choice(n, min(N_QUERIES, n), replace=False))
+    if checker.vectors is not None:
+        queries = np.ascontiguousarray(checker.vectors[rows])
+    else:
+        queries = np.vstack([index.reconstruct(int(r)) for r in rows]).astype('float32')
+
+    def top_value(field, rank=0):
+        counts = np.bincount(filters.codes[field].astype(np.int64))
+        return filters.values[field][int(np.argsort(-counts, kind='stable')[rank])]
+
+    cases = [
+        ("unfiltered", {}),
+        ("largest state", {"state": top_value("state")}),
+        ("5th state", {"state": top_value("state", 4)}),
+        ("periodity", {"periodity": top_value("periodity")}),
+        ("state + periodity", {"state": top_value("state"), "periodity": top_value("periodity")}),
+        ("largest city", {"city": top_value("city", 1)}),
+    ]
+
+    print(f"{n} indexed titles ({type(index).__name__}), {len(queries)} queries, k={K}\n")
+    print(f"{'filter':>18} | {'value':>22} | {'rows':>7} | {'p50 ms':>7} | {'p99 ms':>7} | {'vs none':>7}")
+    print("-" * 84)
+    baseline = None
+    for label, raw in cases:
+        resolved = checker.resolve_filters(raw)
+        partition = len(filters.selection(resolved)[0]) if resolved else n
+        checker._search(queries[:1], K, resolved)  # warm the selector cache
+        times = []
+        for q in queries:
+            t0 = time.perf_counter()
+            checker._search(q[None, :], K, resolved)
+            times.append(time.perf_counter() - t0)
+        p50 = percentile_ms(times, 50)
+        baseline = baseline or p50
+        value = ", ".join(f"{v}" for v in resolved.values()) or "-"
+        print(f"{label:>18} | {value[:22]:>22} | {partition:7d} | {p50:7.3f} | {percentile_ms(times, 99):7.3f} | "
+              f"{baseline / p50:6.2f}x")
+
+    print(f"\nCold selector build (mask + bitmap) for a new combination: ", end="")
+    t0 = time.perf_counter()
+    filters.selection({"state": top_value("state", 2), "periodity": top_value("periodity", 1)})
+    print(f"{(time.perf_counter() - t0) * 1e3:.3f} ms")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import os
+import random
+import time
+from checker import TitleChecker
+from live_session import LiveSession
+
+N_TITLES = int(os.environ.get("BENCH_TITLES", "20"))
+# Delay between keystrokes; 0 replays each title as one burst (fast typist / paste)
+KEY_INTERVAL_MS = float(os.environ.get("BENCH_KEY_INTERVAL_MS", "60"))
+# Stand-in for the encoder + FAISS time of Stage C on production hardware; the
+# placeholder encoder used in tests returns instantly, which hides the effect of superseding
+STAGE_C_EXTRA_MS = float(os.environ.get("BENCH_STAGE_C_MS", "0"))
+
+
+def typed_titles(checker, n):
+    """Plausible new titles: the head of one registered title plus the tail of another."""
+    rng = random.Random(0)
+    titles = [m['Title Name'] for m in checker.metadata if len(m['Title Name'].split()) >= 2]
+    result = []
+    for _ in range(n):
+        head, tail = rng.choice(titles).split(), rng.choice(titles).split()
+        result.append(" ".join(head[:max(1, len(head) - 1)] + tail[-1:]))
+    return result
+
+
+def keystrokes(title):
+    return [title[:i] for i in range(1, len(title) + 1) if not title[:i].endswith(" ")]
+
+
+def run_naive(checker, titles):
+    """One full /verify pipeline per keystroke, as per-keystroke POSTs would run it."""
+    stats = {"requests": 0, "semantic_runs": 0, "titles_scanned": 0}
+    verdicts = {}
+    original_search = checker.check_stage_c_semantic
+    original_lexical = checker.check_stage_b_lexical_phonetic
+
+    def scanned(title, choices=None):
+        if title.lower() not in checker.existing_titles_set:
+            stats["titles_scanned"] += len(checker.existing_titles_set)
+        return original_lexical(title, choices)
+
+    def counted(*args, **kwargs):
+        stats["semantic_runs"] += 1
+        if STAGE_C_EXTRA_MS:
+            time.sleep(STAGE_C_EXTRA_MS / 1e3)
+        return original_search(*args, **kwargs)
+
+    checker.check_stage_c_semantic = counted
+    checker.check_stage_b_lexical_phonetic = scanned
+    t0, cpu0 = time.perf_counter(), time.process_time()
+    try:
+        for title in titles:
+            for text in keystrokes(title):
+                stats["requests"] += 1
+                verdicts[text] = checker.verify(text, record=False)
+                if KEY_INTERVAL_MS:
+                    time.sleep(KEY_INTERVAL_MS / 1e3)
+    finally:
+        checker.check_stage_c_semantic = original_search
+        checker.check_stage_b_lexical_phonetic = original_lexical
+    stats["cpu_seconds"] = time.process_time() - cpu0
+    stats["wall_seconds"] = time.perf_counter() - t0
+    return stats, verdicts
+
+
+async def type_into_session(session, title, finals):
+    queue = asyncio.Queue()
+    for seq, text in enumerate(keystrokes(title)):
+        queue.put_nowait(json.dumps({"seq": seq, "title": text}))
+    last_seq = queue.qsize() - 1
+    done = asyncio.Event()
+
+    async def receive():
+        if queue.empty():
+            await done.wait()
+            raise ConnectionResetError  # client closes once its last input is answered
+        if KEY_INTERVAL_MS:
+            await asyncio.sleep(KEY_INTERVAL_MS / 1e3)
+        return queue.get_nowait()
+
+    async def send(message):
+        if message["phase"] == "final":
+            finals[message["title"]] = message
+        if message["seq"] == last_seq and message["phase"] != "lexical":
+            done.set()
+
+    try:
+        await session.serve(receive, send)
+    except ConnectionResetError:
+        pass
+
+
+def run_live(checker, titles):
+    session = LiveSession(checker)
+    original_phase = session.semantic_phase
+
+    def slowed(*args):
+        if STAGE_C_EXTRA_MS:
+            time.sleep(STAGE_C_EXTRA_MS / 1e3)
+        return original_phase(*args)
+
+    session.semantic_phase = slowed
+    finals = {}
+    t0, cpu0 = time.perf_counter(), time.process_time()
+    for title in titles:
+        asyncio.run(type_into_session(session, title, finals))
+    stats = dict(session.stats, cpu_seconds=time.process_time() - cpu0, wall_seconds=time.perf_counter() - t0)
+    return stats, finals
+
+
+def run_benchmark():
+    print("=========================================")
+    print(" AS-YOU-TYPE: LIVE SESSION vs PER-KEYSTROKE")
+    print("=========================================\n")
+
+    checker = TitleChecker()
+    titles = typed_titles(checker, N_TITLES)
+    n_keys = sum(len(keystrokes(t)) for t in titles)
+    print(f"{len(titles)} titles, {n_keys} keystrokes, {KEY_INTERVAL_MS:g} ms between keys, "
+          f"+{STAGE_C_EXTRA_MS:g} ms per Stage C, {len(checker.existing_titles_set)} registered titles\n")
+
+    live, finals = run_live(checker, titles)
+    naive, verdicts = run_naive(checker, titles)
+
+    # Every final the session sent must match the full pipeline for the same text
+    fields = ("approved", "probability", "reason", "stages")
+    mismatches = [text for text, result in finals.items()
+                  if any(result[f] != verdicts[text][f] for f in fields)]
+
+    rows = [
+        ("pipelines started", naive["requests"], live["lexical_runs"] + live["cache_hits"]),
+        ("inputs superseded (never run)", 0, live["superseded"]),
+        ("Stage C runs (encoder + FAISS)", naive["semantic_runs"], live["semantic_runs"]),
+        ("Stage B titles compared", naive["titles_scanned"], live["titles_scanned"]),
+        ("CPU seconds", round(naive["cpu_seconds"], 3), round(live["cpu_seconds"], 3)),
+    ]
+    print(f"{'':>32} | {'per keystroke':>14} | {'live session':>13} | {'saved':>6}")
+    print("-" * 75)
+    for label, before, after in rows:
+        saved = f"{100 * (1 - after / before):5.1f}%" if before else "-"
+        print(f"{label:>32} | {before:>14} | {after:>13} | {saved:>6}")
+    print(f"\nStage B full scans: {live['full_scans']}, result cache hits: {live['cache_hits']}, "
+          f"Stage C skipped after lexical verdict: {live['semantic_skipped']}")
+    print(f"Finals matching the full pipeline: {len(finals) - len(mismatches)}/{len(finals)}")
+    for text in mismatches[:5]:
+        print(f"  MISMATCH '{text}': {finals[text]['reason']} vs {verdicts[text]['reason']}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,101 @@
+import os
+import random
+import tempfile
+import time
+import numpy as np
+from checker import TitleChecker
+from lexical_index import normalize_devanagari
+from prefix_index import PrefixIndex, save_prefix_index
+
+# Registry size to simulate; real titles are extended with suffix words up to this count
+N_TITLES = int(os.environ.get("BENCH_TITLES", "1000000"))
+N_QUERIES = int(os.environ.get("BENCH_QUERIES", "5000"))
+LIMIT = 10
+SUFFIXES = ["times", "news", "express", "samachar", "patrika", "today", "weekly", "sandesh",
+            "darpan", "awaaz", "jyoti", "prabhat", "kesari", "mail", "herald", "voice"]
+
+
+def synthetic_registry(checker, n):
+    """`n` (title, hindi) pairs: every registered title, then variants with extra words."""
+    rng = random.Random(0)
+    base = [(m.get('Title Name', ''), m.get('Hindi Title', '')) for m in checker.metadata]
+    pairs = list(base)
+    while len(pairs) < n:
+        title, hindi = rng.choice(base)
+        words = " ".join(rng.sample(SUFFIXES, rng.randint(1, 2)))
+        pairs.append((f"{title} {words} {rng.randint(1, 999)}", hindi))
+    return pairs[:n]
+
+
+def queries(pairs, n):
+    """Prefixes of 1-8 characters of random registered titles, English or Hindi."""
+    rng = random.Random(1)
+    result = []
+    while len(result) < n:
+        title, hindi = rng.choice(pairs)
+        text = hindi if hindi and rng.random() < 0.3 else title
+        if text:
+            result.append(text[:rng.randint(1, 8)])
+    return result
+
+
+def latencies(index, texts):
+    times = []
+    for text in texts:
+        t0 = time.perf_counter()
+        index.complete(text, LIMIT)
+        times.append(time.perf_counter() - t0)
+    return np.array(times) * 1e3
+
+
+def report(label, ms):
+    print(f"{label:>28} | p50 {np.percentile(ms, 50):7.3f} ms | p99 {np.percentile(ms, 99):7.3f} ms | "
+          f"max {ms.max():7.3f} ms")
+
+
+def run_benchmark():
+    print("=========================================")
+    print(" TYPE-AHEAD: PREFIX INDEX")
+    print("=========================================\n")
+
+    checker = TitleChecker()
+    pairs = synthetic_registry(checker, N_TITLES)
+    titles, hindi_titles = [p[0] for p in pairs], [p[1] for p in pairs]
+    texts = queries(pairs, N_QUERIES)
+
+    with tempfile.TemporaryDirectory() as prefix_dir:
+        t0 = time.perf_counter()
+        n_keys = save_prefix_index(titles, hindi_titles, prefix_dir)
+        build_seconds = time.perf_counter() - t0
+        on_disk = sum(os.path.getsize(os.path.join(prefix_dir, name)) for name in os.listdir(prefix_dir))
+        index = PrefixIndex.load(prefix_dir)
+        print(f"{N_TITLES} titles -> {n_keys} keys, built in {build_seconds:.1f}s, "
+              f"{on_disk / 2**20:.1f} MiB on disk ({on_disk / n_keys:.1f} bytes/key), memory-mapped\n")
+
+        mapped = latencies(index, texts)
+        # Titles approved after the build sit in the in-memory list and are merged at query time
+        rng = random.Random(2)
+        for i in range(1000):
+            title, hindi = rng.choice(pairs)
+            index.add(f"{title} approved {i}", hindi)
+        with_added = latencies(index, texts)
+
+        # Baseline: startswith over every key, as a set scan would do
+        keys = [index._key(i) for i in range(index.size)]
+        t0 = time.perf_counter()
+        for text in texts[:20]:
+            prefix = normalize_devanagari(text).encode('utf-8')
+            sorted(k for k in keys if k.startswith(prefix))[:LIMIT]
+        scan_ms = (time.perf_counter() - t0) / 20 * 1e3
+
+        print(f"{N_QUERIES} queries, top {LIMIT}, prefix length 1-8")
+        report("mmap index", mapped)
+        report("+ 1000 runtime approvals", with_added)
+        print(f"{'linear scan':>28} | mean {scan_ms:7.1f} ms")
+
+    sample = texts[0]
+    print(f"\nExample '{sample}': {[key for key, _, _ in index.complete(sample, 5)]}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import time
+import numpy as np
+from registry_store import ApprovalStore
+
+N = int(os.environ.get("BENCH_APPROVALS", "5000"))
+
+
+def percentile_us(samples, p):
+    return np.percentile(samples, p) * 1e6
+
+
+def run_benchmark():
+    print("=========================================")
+    print(" APPROVAL REGISTRY LATENCY BENCHMARK")
+    print("=========================================\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "registry.db")
+        writer = ApprovalStore(path)
+        # A second connection stands in for another gunicorn worker tailing the store
+        reader = ApprovalStore(path)
+        cursor = 0
+
+        record_times, sync_times, idle_sync_times = [], [], []
+        for i in range(N):
+            t0 = time.perf_counter()
+            writer.record(f"benchmark title {i}", f"बेंचमार्क {i}")
+            record_times.append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            rows = reader.changes_since(cursor)
+            sync_times.append(time.perf_counter() - t0)
+            cursor = rows[-1][0]
+
+            # Nothing new committed: the common case on the request path
+            t0 = time.perf_counter()
+            reader.changes_since(cursor)
+            idle_sync_times.append(time.perf_counter() - t0)
+
+        for label, samples in [("record (approval write)", record_times),
+                               ("catch-up, 1 new row", sync_times),
+                               ("catch-up, no changes", idle_sync_times)]:
+            print(f"{label:<26} p50 {percentile_us(samples, 50):7.1f} us   "
+                  f"p99 {percentile_us(samples, 99):7.1f} us   max {max(samples) * 1e6:8.1f} us")
+
+        print(f"\n{len(reader)} approvals persisted to {path}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -4,8 +4,16 @@ import faiss
 import pickle
 import os
 import time
+import json
+import shutil
+import hashlib
+import multiprocessing as mp
 import jellyfish
 from sentence_transformers import SentenceTransformer
+from similar_graph import build_similarity_graph, SIMILAR_THRESHOLD, SIMILAR_LEXICAL_CUTOFF
+from metadata_filters import FILTER_COLUMNS, save_filter_columns
+from prefix_index import save_prefix_index
+from index_bundle import staging_dir, publish_bundle, activate_bundle, prune_bundles
 
 # Paths — can be overridden via environment variables for portability
 DATASET_PATH = os.environ.get(
@@ -15,16 +23,181 @@ DATASET_PATH = os.environ.get(
 INDEX_DIR = os.environ.get("INDEX_DIR", os.path.join(os.path.dirname(__file__), "index"))
 MODEL_NAME = "paraphrase-multilingual-MiniLM-L12-v2"
 
+# Encoding is split into fixed-size chunks, each written to its own .npy shard so an
+# interrupted build can resume from the last completed chunk.
+EMBED_WORKERS = int(os.environ.get("EMBED_WORKERS", "1"))
+EMBED_CHUNK_SIZE = int(os.environ.get("EMBED_CHUNK_SIZE", "4096"))
+SHARD_DIR = os.path.join(INDEX_DIR, "shards")
+
+# First-pass storage for the FAISS index: "flat" (float32), "fp16", "int8" (scalar quantised)
+# or "pq" (product quantised). Compressed builds also write the full-precision vectors to
+# vectors.npy, which the checker memory-maps to re-rank the shortlist exactly.
+VECTOR_STORAGE = os.environ.get("VECTOR_STORAGE", "flat")
+PQ_SUBQUANTIZERS = int(os.environ.get("PQ_SUBQUANTIZERS", "48"))
+TRAIN_SAMPLE_SIZE = 50000
+ADD_BLOCK_SIZE = 65536
+
+# Per-process model handle, populated by _init_encoder in each pool worker
+_encoder = None
+
 def compute_phonetic(text):
     if pd.isna(text): return ""
     return jellyfish.metaphone(str(text))
 
+def _init_encoder(num_threads):
+    global _encoder
+    import torch
+    # Split the cores between workers instead of letting every process grab all of them
+    torch.set_num_threads(num_threads)
+    _encoder = SentenceTransformer(MODEL_NAME)
+
+def _encode_chunk(task):
+    """
+    Encodes one chunk and writes it as a memory-mapped .npy shard.
+    The shard is written under a temporary name and renamed on completion,
+    so a shard that exists on disk is always complete.
+    """
+    chunk_id, texts, shard_path = task
+    t0 = time.time()
+    embeddings = _encoder.encode(texts, show_progress_bar=False, convert_to_numpy=True).astype('float32')
+    faiss.normalize_L2(embeddings)
+
+    tmp_path = shard_path + ".tmp"
+    shard = np.lib.format.open_memmap(tmp_path, mode='w+', dtype='float32', shape=embeddings.shape)
+    shard[:] = embeddings
+    shard.flush()
+    del shard
+    os.replace(tmp_path, shard_path)
+    return chunk_id, len(texts), time.time() - t0
+
+def _shard_is_complete(shard_path, expected_rows):
+    if not os.path.exists(shard_path):
+        return False
+    try:
+        return np.load(shard_path, mmap_mode='r').shape[0] == expected_rows
+    except (ValueError, OSError):
+        return False
+
+def _prepare_shard_dir(texts, chunk_size):
+    """
+    Keeps shards from a previous run only if they were produced from the same
+    texts, model and chunk size; otherwise starts from a clean directory.
+    """
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode('utf-8'))
+        digest.update(b"\0")
+    fingerprint = {"model": MODEL_NAME, "rows": len(texts), "chunk_size": chunk_size, "sha256": digest.hexdigest()}
+
+    manifest_path = os.path.join(SHARD_DIR, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            if json.load(f) == fingerprint:
+                return
+        print("Dataset or settings changed since the last run — discarding old shards.")
+        shutil.rmtree(SHARD_DIR)
+
+    os.makedirs(SHARD_DIR, exist_ok=True)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(fingerprint, f)
+
+def encode_in_shards(texts, workers=EMBED_WORKERS, chunk_size=EMBED_CHUNK_SIZE):
+    """
+    Encodes texts chunk by chunk across a pool of worker processes.
+    Returns the ordered list of shard paths; chunks already on disk are skipped.
+    """
+    _prepare_shard_dir(texts, chunk_size)
+
+    shard_paths = []
+    pending = []
+    for chunk_id, start in enumerate(range(0, len(texts), chunk_size)):
+        chunk = texts[start:start + chunk_size]
+        shard_path = os.path.join(SHARD_DIR, f"chunk_{chunk_id:05d}.npy")
+        shard_paths.append(shard_path)
+        if not _shard_is_complete(shard_path, len(chunk)):
+            pending.append((chunk_id, chunk, shard_path))
+
+    done = len(shard_paths) - len(pending)
+    if done:
+        print(f"Resuming: {done}/{len(shard_paths)} chunks already encoded.")
+    if not pending:
+        return shard_paths
+
+    workers = max(1, min(workers, len(pending)))
+    print(f"Encoding {len(pending)} chunk(s) of up to {chunk_size} titles with {workers} worker(s)...")
+    t0 = time.time()
+    encoded_rows = 0
+
+    def report(result):
+        nonlocal done, encoded_rows
+        chunk_id, rows, elapsed = result
+        done += 1
+        encoded_rows += rows
+        print(f"  chunk {chunk_id:05d}: {rows} titles in {elapsed:.2f}s "
+              f"({rows / max(elapsed, 1e-9):.1f} titles/s) [{done}/{len(shard_paths)}]")
+
+    if workers == 1:
+        _init_encoder(os.cpu_count() or 1)
+        for task in pending:
+            report(_encode_chunk(task))
+    else:
+        # spawn rather than fork: forking a process that has initialised torch can deadlock
+        ctx = mp.get_context("spawn")
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        with ctx.Pool(workers, initializer=_init_encoder, initargs=(threads,)) as pool:
+            for result in pool.imap_unordered(_encode_chunk, pending):
+                report(result)
+
+    elapsed = time.time() - t0
+    print(f"Encoded {encoded_rows} titles in {elapsed:.2f} seconds ({encoded_rows / max(elapsed, 1e-9):.1f} titles/s overall).")
+    return shard_paths
+
+def assemble_vectors(shard_paths, out_path):
+    """Concatenates shards into one memory-mapped float32 .npy, one shard in memory at a time."""
+    shapes = [np.load(p, mmap_mode='r').shape for p in shard_paths]
+    total = sum(shape[0] for shape in shapes)
+    tmp_path = out_path + ".tmp"
+    vectors = np.lib.format.open_memmap(tmp_path, mode='w+', dtype='float32', shape=(total, shapes[0][1]))
+    offset = 0
+    for shard_path, shape in zip(shard_paths, shapes):
+        vectors[offset:offset + shape[0]] = np.load(shard_path, mmap_mode='r')
+        offset += shape[0]
+    vectors.flush()
+    del vectors
+    os.replace(tmp_path, out_path)
+    return np.load(out_path, mmap_mode='r')
+
+def create_vector_index(vectors, storage=VECTOR_STORAGE):
+    """
+    Builds the first-pass FAISS index over L2-normalised vectors (Inner Product == Cosine).
+    Quantised variants are trained on a sample and filled block by block from the memory map.
+    """
+    n, dimension = vectors.shape
+    if storage == "flat":
+        index = faiss.IndexFlatIP(dimension)
+    elif storage == "fp16":
+        index = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+    elif storage == "int8":
+        index = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+    elif storage == "pq":
+        index = faiss.IndexPQ(dimension, PQ_SUBQUANTIZERS, 8, faiss.METRIC_INNER_PRODUCT)
+    else:
+        raise ValueError(f"Unknown VECTOR_STORAGE '{storage}' (expected flat, fp16, int8 or pq)")
+
+    if not index.is_trained:
+        rng = np.random.default_rng(0)
+        sample = np.sort(rng.choice(n, min(n, TRAIN_SAMPLE_SIZE), replace=False))
+        index.train(np.ascontiguousarray(vectors[sample]))
+    for start in range(0, n, ADD_BLOCK_SIZE):
+        index.add(np.ascontiguousarray(vectors[start:start + ADD_BLOCK_SIZE]))
+    return index
+
 def build_index():
     print("Loading dataset...")
     df = pd.read_csv(DATASET_PATH, encoding='utf-8-sig')
 
     # Validate required columns before processing
-    required_cols = {'Title Name', 'Hindi Title', 'Periodity'}
+    required_cols = {'Title-Code', 'Title Name', 'Hindi Title'} | set(FILTER_COLUMNS.values())
     missing = required_cols - set(df.columns)
     if missing:
         raise ValueError(f"Dataset is missing required column(s): {missing}")
@@ -33,6 +206,7 @@ def build_index():
     print(f"Initial rows: {len(df)}")
     df['Title Name'] = df['Title Name'].fillna('').astype(str).str.strip().str.lower()
     df['Hindi Title'] = df['Hindi Title'].fillna('').astype(str).str.strip()
+    df['Title-Code'] = df['Title-Code'].fillna('').astype(str).str.strip().str.upper()
     
     # We drop empty English titles
     df = df[df['Title Name'] != ""]
@@ -42,38 +216,65 @@ def build_index():
     print("Pre-computing Phonetic representations (Metaphone)...")
     df['Phonetic_English'] = df['Title Name'].apply(compute_phonetic)
     
-    print(f"Loading SentenceTransformer model: {MODEL_NAME} ...")
-    model = SentenceTransformer(MODEL_NAME)
-    
     # We embed a combination of English and Hindi for maximum semantic overlap
-    print("Encoding texts...")
-    t0 = time.time()
     # "title | hindi_title" provides context to the multilingual model
     combined_texts = df['Title Name'] + " | " + df['Hindi Title']
-    embeddings = model.encode(combined_texts.tolist(), show_progress_bar=True, convert_to_numpy=True)
-    print(f"Encoded {len(embeddings)} titles in {time.time() - t0:.2f} seconds.")
-    
-    print("Building FAISS index...")
-    dimension = embeddings.shape[1]
-    
-    # Use L2 normalized + Inner Product (Cosine Similarity)
-    faiss.normalize_L2(embeddings)
-    index = faiss.IndexFlatIP(dimension) 
-    index.add(embeddings)
-    
-    os.makedirs(INDEX_DIR, exist_ok=True)
-    
-    faiss_path = os.path.join(INDEX_DIR, "titles.index")
-    faiss.write_index(index, faiss_path)
-    print(f"Saved FAISS index to {faiss_path}")
+    shard_paths = encode_in_shards(combined_texts.tolist())
+
+    # Every output goes into a staging bundle that is checksummed, published under its
+    # version and only then activated, so serving workers never see a half-written build.
+    bundle_dir = staging_dir()
+
+    # Shards are already L2 normalised. They are streamed into one memory-mapped
+    # file on disk, so the full matrix is never held in RAM twice. A flat index holds
+    # exact vectors itself, so its copy is scratch space that goes with the shards.
+    if VECTOR_STORAGE == "flat":
+        vectors = assemble_vectors(shard_paths, os.path.join(SHARD_DIR, "vectors.npy"))
+    else:
+        vectors = assemble_vectors(shard_paths, os.path.join(bundle_dir, "vectors.npy"))
+        print("Saved full-precision vectors to the bundle")
+
+    print(f"Building FAISS index ({VECTOR_STORAGE})...")
+    index = create_vector_index(vectors, VECTOR_STORAGE)
+
+    print(f"Building near-duplicate graph (cosine >= {SIMILAR_THRESHOLD}, lexical >= {SIMILAR_LEXICAL_CUTOFF})...")
+    stats = build_similarity_graph(vectors, df['Title Name'].tolist(), os.path.join(bundle_dir, "graph"))
+    print(f"Saved near-duplicate graph: {stats['edges']} edges, "
+          f"{stats['clusters']} clusters covering {stats['titles_in_clusters']} titles")
+    del vectors
+
+    faiss.write_index(index, os.path.join(bundle_dir, "titles.index"))
+    print(f"Saved FAISS index ({index.ntotal} vectors)")
     
     # Save the metadata so when we get index 'i', we know the title
-    metadata = df[['Title Name', 'Hindi Title', 'Phonetic_English', 'Periodity']].to_dict(orient='records')
-    meta_path = os.path.join(INDEX_DIR, "metadata.pkl")
-    with open(meta_path, 'wb') as f:
+    metadata = df[['Title-Code', 'Title Name', 'Hindi Title', 'Phonetic_English', 'Periodity']].to_dict(orient='records')
+    with open(os.path.join(bundle_dir, "metadata.pkl"), 'wb') as f:
         pickle.dump(metadata, f)
-    print(f"Saved metadata to {meta_path}")
-    
+    print(f"Saved metadata for {len(metadata)} titles")
+
+    # State / city / periodity as dictionary-encoded arrays, row-aligned with the index
+    save_filter_columns(df, os.path.join(bundle_dir, "filters.npz"))
+    print("Saved filter columns")
+
+    # Sorted English / Hindi title keys for GET /titles/complete
+    keys = save_prefix_index(df['Title Name'].tolist(), df['Hindi Title'].tolist(), os.path.join(bundle_dir, "prefix"))
+    print(f"Saved prefix index ({keys} keys)")
+
+    with open(DATASET_PATH, 'rb') as f:
+        dataset_sha256 = hashlib.sha256(f.read()).hexdigest()
+    version = publish_bundle(bundle_dir, {
+        "model": MODEL_NAME,
+        "vector_storage": VECTOR_STORAGE,
+        "rows": len(metadata),
+        "dataset_sha256": dataset_sha256,
+    })
+    activate_bundle(version)
+    prune_bundles()
+    print(f"Published and activated index bundle {version}")
+
+    # Shards are only needed to resume an interrupted build
+    shutil.rmtree(SHARD_DIR, ignore_errors=True)
+
     print("Index build complete!")
 
 if __name__ == "__main__":
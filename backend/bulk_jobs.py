@@ -0,0 +1,269 @@
+"""
+Resumable bulk verification of uploaded CSV / XLSX files.
+
+The upload is spooled to disk once and then read row by row, so memory stays flat
+regardless of file size. Results are appended to results.ndjson as each batch finishes;
+that file is the job's checkpoint. A client that disconnects can reconnect with the
+job id and the last row it received: stored results are replayed and processing
+continues from the first row without a result.
+"""
+import csv
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: no cross-process job locking
+    fcntl = None
+
+INDEX_DIR = os.environ.get("INDEX_DIR", os.path.join(os.path.dirname(__file__), "index"))
+JOBS_DIR = os.environ.get("JOBS_DIR", os.path.join(INDEX_DIR, "jobs"))
+BULK_BATCH_SIZE = int(os.environ.get("BULK_BATCH_SIZE", "64"))
+BULK_JOB_TTL_HOURS = float(os.environ.get("BULK_JOB_TTL_HOURS", "24"))
+PROGRESS_INTERVAL_SECONDS = 1.0
+
+TITLE_COLUMNS = ("title name", "title")
+HINDI_COLUMNS = ("hindi title", "hindi_title")
+SUPPORTED_FORMATS = (".csv", ".xlsx")
+_JOB_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+class JobBusy(Exception):
+    """Raised when another connection is already streaming the same job."""
+
+
+def _write_json_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _prune_expired_jobs():
+    if not os.path.isdir(JOBS_DIR):
+        return
+    cutoff = time.time() - BULK_JOB_TTL_HOURS * 3600
+    for name in os.listdir(JOBS_DIR):
+        path = os.path.join(JOBS_DIR, name)
+        if _JOB_ID_RE.match(name) and os.path.getmtime(path) < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+class BulkJob:
+    def __init__(self, job_dir: str):
+        self.job_dir = job_dir
+        with open(os.path.join(job_dir, "job.json"), 'r', encoding='utf-8') as f:
+            self.info = json.load(f)
+        self.job_id = self.info["job_id"]
+        self.input_path = os.path.join(job_dir, "input" + self.info["format"])
+        self.results_path = os.path.join(job_dir, "results.ndjson")
+        self._lock_file = None
+
+    @classmethod
+    def create(cls, stream, filename: str):
+        """Spools an uploaded file into a new job directory. Raises ValueError for unusable files."""
+        ext = os.path.splitext(filename or "")[1].lower()
+        if ext not in SUPPORTED_FORMATS:
+            raise ValueError(f"Unsupported file type '{ext}'. Upload a .csv or .xlsx file.")
+
+        _prune_expired_jobs()
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(JOBS_DIR, job_id)
+        os.makedirs(job_dir)
+        input_path = os.path.join(job_dir, "input" + ext)
+        with open(input_path, 'wb') as f:
+            shutil.copyfileobj(stream, f, 1024 * 1024)
+
+        try:
+            header = next(_read_rows(input_path, ext), None)
+            title_col, hindi_col = _resolve_columns(header)
+            rows_total = sum(1 for _ in _read_rows(input_path, ext)) - 1
+        except ValueError:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+        except Exception as e:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise ValueError(f"Could not parse uploaded file: {e}")
+
+        _write_json_atomic(os.path.join(job_dir, "job.json"), {
+            "job_id": job_id,
+            "filename": filename,
+            "format": ext,
+            "title_column": title_col,
+            "hindi_column": hindi_col,
+            "rows_total": rows_total,
+            "created_at": time.time(),
+        })
+        return cls(job_dir)
+
+    @classmethod
+    def open(cls, job_id: str):
+        """Returns the job, or None if the id is malformed or unknown."""
+        if not _JOB_ID_RE.match(job_id or ""):
+            return None
+        job_dir = os.path.join(JOBS_DIR, job_id)
+        if not os.path.exists(os.path.join(job_dir, "job.json")):
+            return None
+        return cls(job_dir)
+
+    def acquire(self):
+        """Takes the per-job lock so two connections never process the same job. Raises JobBusy."""
+        self._lock_file = open(os.path.join(self.job_dir, "lock"), 'w')
+        if fcntl is None:
+            return
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            self._lock_file = None
+            raise JobBusy(f"Job {self.job_id} is already being streamed by another connection.")
+
+    def release(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _checkpoint(self):
+        """
+        Number of rows with a stored result. A line cut short by a crash is truncated away,
+        so the row it belonged to is simply processed again.
+        """
+        if not os.path.exists(self.results_path):
+            return 0
+        rows_done = 0
+        valid_bytes = 0
+        with open(self.results_path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                rows_done += 1
+                valid_bytes += len(line)
+        if valid_bytes != os.path.getsize(self.results_path):
+            with open(self.results_path, 'r+b') as f:
+                f.truncate(valid_bytes)
+        return rows_done
+
+    def _pending_rows(self, skip: int):
+        rows = _read_rows(self.input_path, self.info["format"])
+        next(rows, None)  # header
+        title_col, hindi_col = self.info["title_column"], self.info["hindi_column"]
+        for row_number, row in enumerate(rows, start=1):
+            if row_number <= skip:
+                continue
+            title = _cell(row, title_col)
+            hindi_title = _cell(row, hindi_col) if hindi_col is not None else ""
+            yield row_number, title, hindi_title
+
+    def stream(self, verify_batch, after: int = 0, batch_size: int = BULK_BATCH_SIZE):
+        """
+        Yields NDJSON lines: a `job` header, stored results for rows > `after`, then new
+        results as batches complete, interleaved with `progress` events, and a final `done`.
+        `verify_batch(items, sources)` maps [(title, hindi_title), ...] to /verify-shaped result
+        dicts; each source is "<job_id>:<row>", so a row approved before a crash keeps its verdict.
+        Must be called after acquire(); the lock is released when the stream ends.
+        """
+        try:
+            rows_total = self.info["rows_total"]
+            rows_done = self._checkpoint()
+            yield _ndjson({"event": "job", "job_id": self.job_id, "rows_total": rows_total, "rows_done": rows_done})
+
+            if after < rows_done:
+                with open(self.results_path, 'r', encoding='utf-8') as f:
+                    for row_number, line in enumerate(f, start=1):
+                        if row_number > after:
+                            yield line
+
+            t0 = time.time()
+            processed = 0
+            last_progress = t0
+            batch = []
+            with open(self.results_path, 'a', encoding='utf-8') as results:
+                for row in self._pending_rows(rows_done):
+                    batch.append(row)
+                    if len(batch) < batch_size:
+                        continue
+                    yield from self._run_batch(batch, verify_batch, results)
+                    processed += len(batch)
+                    batch = []
+                    if time.time() - last_progress >= PROGRESS_INTERVAL_SECONDS:
+                        last_progress = time.time()
+                        yield _progress(rows_done + processed, rows_total, processed, last_progress - t0)
+                if batch:
+                    yield from self._run_batch(batch, verify_batch, results)
+                    processed += len(batch)
+
+            elapsed = time.time() - t0
+            yield _progress(rows_done + processed, rows_total, processed, elapsed)
+            yield _ndjson({"event": "done", "job_id": self.job_id, "rows_done": rows_done + processed,
+                           "elapsed_seconds": round(elapsed, 2)})
+        finally:
+            self.release()
+
+    def _run_batch(self, batch, verify_batch, results):
+        valid = [(title, hindi_title) for _, title, hindi_title in batch if title]
+        sources = [f"{self.job_id}:{row_number}" for row_number, title, _ in batch if title]
+        verdicts = iter(verify_batch(valid, sources)) if valid else iter(())
+        lines = []
+        for row_number, title, hindi_title in batch:
+            if title:
+                record = {"event": "result", "row": row_number, "title": title, "hindi_title": hindi_title}
+                record.update(next(verdicts))
+            else:
+                record = {"event": "result", "row": row_number, "error": "Title Name must be provided."}
+            lines.append(_ndjson(record))
+        # Checkpoint before sending: a disconnect after this point replays instead of re-verifying
+        results.write("".join(lines))
+        results.flush()
+        yield from lines
+
+
+def _ndjson(obj):
+    return json.dumps(obj, ensure_ascii=False) + "\n"
+
+
+def _progress(rows_done, rows_total, processed, elapsed):
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    eta = (rows_total - rows_done) / rate if rate > 0 else None
+    return _ndjson({
+        "event": "progress",
+        "rows_done": rows_done,
+        "rows_total": rows_total,
+        "rows_per_second": round(rate, 1),
+        "eta_seconds": round(eta, 1) if eta is not None else None,
+    })
+
+
+def _cell(row, col):
+    if col is None or col >= len(row) or row[col] is None:
+        return ""
+    return str(row[col]).strip()
+
+
+def _resolve_columns(header):
+    if not header:
+        raise ValueError("Uploaded file is empty.")
+    names = [str(h or "").strip().lower() for h in header]
+    title_col = next((names.index(c) for c in TITLE_COLUMNS if c in names), None)
+    if title_col is None:
+        raise ValueError("Uploaded file needs a 'Title Name' (or 'title') column.")
+    hindi_col = next((names.index(c) for c in HINDI_COLUMNS if c in names), None)
+    return title_col, hindi_col
+
+
+def _read_rows(path, ext):
+    """Yields rows (header first) one at a time without loading the file into memory."""
+    if ext == ".csv":
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            yield from csv.reader(f)
+    else:
+        from openpyxl import load_workbook
+        # read_only streams the sheet XML instead of building the whole workbook
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            yield from wb.active.iter_rows(values_only=True)
+        finally:
+            wb.close()
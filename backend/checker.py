@@ -1,38 +1,51 @@
 import re
 import faiss
-import pickle
 import numpy as np
 import os
 import threading
+import time
+import weakref
+from contextlib import contextmanager
 from sentence_transformers import SentenceTransformer
+from registry_store import ApprovalStore
+from index_bundle import IndexBundle, current_version
 
 # INDEX_DIR can be overridden via the INDEX_DIR environment variable for portability
 INDEX_DIR = os.environ.get("INDEX_DIR", os.path.join(os.path.dirname(__file__), "index"))
+# Durable approvals shared by all workers; defaults to living next to the index
+REGISTRY_DB = os.environ.get("REGISTRY_DB", os.path.join(INDEX_DIR, "registry.db"))
+# Shortlist size fetched from a compressed (fp16 / int8 / PQ) index before exact re-ranking
+RERANK_K = int(os.environ.get("RERANK_K", "50"))
+# Stage B fuzzy cutoff. Tuned up from 60: must be highly lexically similar to flag
+LEXICAL_SCORE_CUTOFF = 75
+# How often each worker checks INDEX_DIR/CURRENT for a newly activated bundle (0 disables)
+BUNDLE_WATCH_SECONDS = float(os.environ.get("BUNDLE_WATCH_SECONDS", "10"))
+
+def rerank_exact(vectors, query, candidate_ids, k):
+    """Re-scores a shortlist against full-precision vectors; returns the exact top-k (scores, ids)."""
+    # Sorted ids turn the gather into mostly sequential reads of the memory map
+    candidates = np.sort(candidate_ids[candidate_ids >= 0])
+    scores = vectors[candidates] @ query
+    order = np.argsort(-scores, kind='stable')[:k]
+    return scores[order], candidates[order]
 
 class TitleChecker:
     def __init__(self):
-        # Load FAISS index
-        faiss_path = os.path.join(INDEX_DIR, "titles.index")
-        if os.path.exists(faiss_path):
-            self.index = faiss.read_index(faiss_path)
-        else:
-            self.index = None
-            print("WARNING: FAISS index not found. Run build_index.py first.")
-            
-        # Load Metadata
-        # NOTE: pickle.load is used here for performance on a trusted, locally-generated file.
-        # Do NOT expose the metadata.pkl path to untrusted input.
-        meta_path = os.path.join(INDEX_DIR, "metadata.pkl")
-        if os.path.exists(meta_path):
-            with open(meta_path, 'rb') as f:
-                self.metadata = pickle.load(f)
-        else:
-            self.metadata = []
-            
-        # Extract purely sets for ultra-fast lookup
-        self.existing_titles_set = {str(m['Title Name']).lower() for m in self.metadata if 'Title Name' in m}
-        self.existing_hindi_set = {str(m['Hindi Title']) for m in self.metadata if m.get('Hindi Title')}
+        # Everything derived from the index build lives in an IndexBundle (see index_bundle.py).
+        # Each verification pins the bundle that was current when it started, so a reload
+        # swaps self._bundle without changing the data under requests already in flight.
         self._titles_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._pinned = threading.local()
+        self._bundle = IndexBundle.load()
+        # Bundles still referenced by a request; approvals are merged into all of them
+        self._live_bundles = weakref.WeakSet([self._bundle])
+
+        # Approvals from every worker (and previous runs) live in the shared registry.
+        # Each bundle tracks the last approval id merged into its in-memory structures.
+        os.makedirs(os.path.dirname(os.path.abspath(REGISTRY_DB)), exist_ok=True)
+        self.registry = ApprovalStore(REGISTRY_DB)
+        self.sync_registry()
         
         # Load Transformer model for online inference
         self.model = SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2")
@@ -42,6 +55,151 @@ class TitleChecker:
         self.periodicity_words = {"daily", "weekly", "monthly", "fortnightly", "annual"}
         self.common_prefixes = {"the", "india", "samachar", "news", "times", "journal"}
 
+    @property
+    def bundle(self) -> IndexBundle:
+        """The bundle pinned by the current request, else the active one."""
+        return getattr(self._pinned, "bundle", None) or self._bundle
+
+    index = property(lambda self: self.bundle.index)
+    vectors = property(lambda self: self.bundle.vectors)
+    _rerank = property(lambda self: self.bundle.rerank)
+    metadata = property(lambda self: self.bundle.metadata)
+    existing_titles_set = property(lambda self: self.bundle.existing_titles_set)
+    metadata_filters = property(lambda self: self.bundle.metadata_filters)
+    similar_graph = property(lambda self: self.bundle.similar_graph)
+    title_code_rows = property(lambda self: self.bundle.title_code_rows)
+    hindi_index = property(lambda self: self.bundle.hindi_index)
+
+    @contextmanager
+    def pinned_bundle(self, bundle: IndexBundle = None):
+        """
+        Holds one bundle (default: the active one) for the duration of a request. Re-entrant.
+        Passing the bundle lets work for one request continue on another thread.
+        """
+        if getattr(self._pinned, "bundle", None) is not None:
+            yield self._pinned.bundle
+            return
+        self._pinned.bundle = bundle or self._bundle
+        try:
+            yield self._pinned.bundle
+        finally:
+            self._pinned.bundle = None
+
+    def sync_registry(self):
+        """
+        Merges approvals committed by other workers since the last call.
+        Cheap when nothing changed: a single PRAGMA, no table scan.
+        """
+        # Fetched and merged under one lock: changes_since advances the store's data_version,
+        # so a concurrent call that sees no changes must not run ahead of this merge.
+        with self._titles_lock:
+            bundles = list(self._live_bundles)
+            rows = self.registry.changes_since(min(b.registry_cursor for b in bundles))
+            for bundle in bundles:
+                bundle.merge_approvals(rows)
+
+    def reload_bundle(self, version: str = None):
+        """
+        Loads `version` (default: the one named by INDEX_DIR/CURRENT), checks its checksums,
+        catches it up with the registry and makes it the active bundle. Requests already
+        running finish on the previous bundle, which is freed when the last one returns.
+        Returns True if the active bundle changed; raises ValueError for a missing or corrupt bundle.
+        """
+        with self._reload_lock:
+            version = version or current_version()
+            if version is None or version == self._bundle.version:
+                return False
+            t0 = time.time()
+            bundle = IndexBundle.load(version)
+            if bundle.index is not None and self._bundle.index is not None and bundle.index.d != self._bundle.index.d:
+                raise ValueError(f"Bundle '{version}' has dimension {bundle.index.d}, expected {self._bundle.index.d}")
+            # Bulk of the catch-up off the lock; only approvals made meanwhile are merged under it
+            bundle.merge_approvals(self.registry.rows_since(0))
+            with self._titles_lock:
+                bundle.merge_approvals(self.registry.rows_since(bundle.registry_cursor))
+                self._live_bundles.add(bundle)
+                previous, self._bundle = self._bundle, bundle
+            print(f"Index bundle {previous.version} -> {bundle.version} ({len(bundle.metadata)} titles, "
+                  f"{time.time() - t0:.2f}s)")
+            return True
+
+    def watch_bundles(self, interval: float = BUNDLE_WATCH_SECONDS):
+        """Starts a daemon thread that reloads whenever INDEX_DIR/CURRENT names a new bundle."""
+        def watch():
+            failed = None
+            while True:
+                time.sleep(interval)
+                version = current_version()
+                if version is None or version == failed:
+                    continue
+                try:
+                    self.reload_bundle(version)
+                except Exception as e:
+                    # Keep serving the active bundle until a different version is activated
+                    failed = version
+                    print(f"WARNING: index bundle {version} not loaded: {e}")
+
+        thread = threading.Thread(target=watch, name="bundle-watcher", daemon=True)
+        thread.start()
+        return thread
+
+    def similar_titles(self, title_code: str, limit: int = 20):
+        """
+        Registered titles that conflict with `title_code`, read from the precomputed graph
+        in O(degree) without encoding anything. Returns None for an unknown Title-Code.
+        """
+        with self.pinned_bundle():
+            return self._similar_titles(title_code.strip().upper(), limit)
+
+    def _similar_titles(self, code: str, limit: int):
+        rows = self.title_code_rows.get(code)
+        if rows is None:
+            return None
+
+        # A Title-Code can appear on several rows; merge their neighbours, one entry per code
+        best = {}
+        for row in rows:
+            for neighbour, score, kinds in self.similar_graph.neighbours(row):
+                other = self.metadata[neighbour]
+                other_code = other.get('Title-Code') or f"row-{neighbour}"
+                if other_code == code:
+                    continue
+                if other_code not in best or score > best[other_code]["score"]:
+                    best[other_code] = {
+                        "title_code": other_code,
+                        "title": other.get('Title Name', ''),
+                        "hindi_title": other.get('Hindi Title', ''),
+                        "score": score,
+                        "match": kinds,
+                    }
+
+        similar = sorted(best.values(), key=lambda m: -m["score"])
+        meta = self.metadata[rows[0]]
+        return {
+            "title_code": code,
+            "title": meta.get('Title Name', ''),
+            "hindi_title": meta.get('Hindi Title', ''),
+            "degree": len(similar),
+            "similar": similar[:limit],
+        }
+
+    def complete_titles(self, text: str, limit: int = 10):
+        """
+        Registered titles whose normalised English or Hindi form starts with `text`, in key order,
+        one entry per distinct title. Titles approved since the build have no Title-Code yet.
+        """
+        with self.pinned_bundle() as bundle:
+            matches = []
+            for key, row, count in bundle.prefix_index.complete(text, limit):
+                if row >= 0:
+                    meta = self.metadata[row]
+                    code, title, hindi_title = meta.get('Title-Code') or None, meta.get('Title Name', ''), meta.get('Hindi Title', '')
+                else:
+                    code, (title, hindi_title) = None, bundle.prefix_index.added[-1 - row]
+                matches.append({"title_code": code, "title": title, "hindi_title": hindi_title,
+                                "matched": key, "registrations": count})
+            return matches
+
     def check_stage_a_hard_rules(self, title: str):
         """
         Stage A: Hard Rule Validation
@@ -89,10 +247,12 @@ class TitleChecker:
 
         return True, "Passed Hard Rules"
 
-    def check_stage_b_lexical_phonetic(self, title: str):
+    def check_stage_b_lexical_phonetic(self, title: str, choices=None):
         """
         Stage B: Lexical & Phonetic Similarity
         Returns max score (0-100) and reason
+        `choices` may replace existing_titles_set for the fuzzy scan when the caller has already
+        narrowed it to every title that can reach the cutoff (see live_session.py).
         """
         from rapidfuzz import process, fuzz as rfuzz
         title_lower = title.lower()
@@ -105,9 +265,9 @@ class TitleChecker:
         # process.extractOne uses heavily optimized C++ under the hood.
         best_match = process.extractOne(
             title_lower, 
-            self.existing_titles_set, 
+            self.existing_titles_set if choices is None else choices, 
             scorer=rfuzz.ratio,
-            score_cutoff=75  # Tuned up from 60: must be highly lexically similar to flag
+            score_cutoff=LEXICAL_SCORE_CUTOFF
         )
         
         if best_match:
@@ -117,34 +277,81 @@ class TitleChecker:
             
         return 0, "No strong lexical matches"
 
-    def check_stage_c_semantic(self, title: str, hindi_title: str = ""):
+    def check_stage_b_hindi_lexical(self, title: str, hindi_title: str = ""):
+        """
+        Stage B (Hindi): Devanagari exact/fuzzy match and cross-script transliteration match.
+        Returns max score (0-100) and reason; 100 means the normalised Hindi title already exists.
+        """
+        return self.hindi_index.search(title, hindi_title)
+
+    def encode_queries(self, items):
+        """
+        Encodes [(title, hindi_title), ...] in a single model call.
+        Returns L2-normalised float32 embeddings, one row per item.
+        """
+        combined_queries = [f"{title} | {hindi_title}".strip(" |") for title, hindi_title in items]
+        embeddings = self.model.encode(combined_queries, convert_to_numpy=True)
+        # Normalize for cosine similarity
+        faiss.normalize_L2(embeddings)
+        return embeddings
+
+    def resolve_filters(self, filters):
+        """Validates {state, city, periodity} filters; raises ValueError if they cannot be applied."""
+        if not any(filters.values() if filters else ()):
+            return {}
+        if self.metadata_filters is None:
+            raise ValueError("Filtered search is unavailable: rebuild the index to generate filters.npz.")
+        return self.metadata_filters.resolve(filters)
+
+    def _search(self, embedding, k, filters=None):
+        """
+        Returns (scores, ids) of the top-k neighbours of one normalised query.
+        A compressed index is only used to shortlist RERANK_K candidates; their scores are
+        recomputed exactly from the full-precision vectors, so results match a flat index
+        whenever the true top-k are in the shortlist.
+        `filters` (already resolved) restricts the search to matching rows through an ID selector.
+        """
+        params = None
+        if filters:
+            ids, selector, _bits = self.metadata_filters.selection(filters)
+            if isinstance(self.index, faiss.IndexPQ):
+                # IndexPQ takes no selector: score the partition exactly from the memory map
+                return rerank_exact(self.vectors, embedding[0], ids, k)
+            params = faiss.SearchParameters(sel=selector)
+
+        if not self._rerank:
+            distances, indices = self.index.search(embedding, k, params=params)
+            return distances[0], indices[0]
+
+        _, indices = self.index.search(embedding, max(k, RERANK_K), params=params)
+        return rerank_exact(self.vectors, embedding[0], indices[0], k)
+
+    def check_stage_c_semantic(self, title: str, hindi_title: str = "", embedding=None, filters=None):
         """
         Stage C: Semantic & Conceptual Similarity
         Uses FAISS for ultra-fast cosine similarity lookups.
         Returns max score (0-100), reason, and Top-K matches list.
+        `embedding` may be passed in (shape 1 x dim) when the query was already encoded as part of a batch.
+        `filters` restricts the candidates to one state / city / periodity partition.
         """
         if self.index is None:
             return 0, "FAISS index unavailable", []
-            
-        combined_query = f"{title} | {hindi_title}".strip(" |")
-        
-        # Encode and normalize for cosine similarity
-        embedding = self.model.encode([combined_query], convert_to_numpy=True)
-        faiss.normalize_L2(embedding)
+
+        if embedding is None:
+            embedding = self.encode_queries([(title, hindi_title)])
         
         # Search top 5
         k = 5
-        distances, indices = self.index.search(embedding, k)
-        
+        distances, indices = self._search(embedding, k, filters)
+
         top_score = 0
         top_reason = ""
         top_k_matches = []
-        
-        for i in range(k):
-            idx = indices[0][i]
-            # FAISS IndexFlatIP on L2-normalised vectors returns cosine similarity in [-1, 1].
+
+        for distance, idx in zip(distances, indices):
+            # Inner product on L2-normalised vectors is cosine similarity in [-1, 1].
             # Clamp to [0, 1] then scale to percentage.
-            raw_score = float(np.clip(distances[0][i], 0.0, 1.0)) * 100
+            raw_score = float(np.clip(distance, 0.0, 1.0)) * 100
 
             # Non-linear tuning for MiniLM density:
             # MiniLM naturally clusters even unrelated text around 40-50%.
@@ -171,9 +378,12 @@ class TitleChecker:
 
         return top_score, top_reason or "No semantic matches found", top_k_matches
 
-    def verify(self, title: str, hindi_title: str = ""):
+    def check_lexical_stages(self, title: str, hindi_title: str = "", choices=None):
         """
-        Overall Verification Logic (Stage D)
+        Stages A, B and B (Hindi), which need no encoder call.
+        Returns (rejection, None) when one of them rejects outright, otherwise
+        (None, (hard_reason, lex_score, lex_reason, hindi_score, hindi_reason)) for Stage D.
+        `choices` optionally narrows the fuzzy part of Stage B (see check_stage_b_lexical_phonetic).
         """
         # A: Hard Rules
         hard_pass, hard_reason = self.check_stage_a_hard_rules(title)
@@ -186,10 +396,10 @@ class TitleChecker:
                 "stages": {"A": hard_reason},
                 "top_k_matches": [],
                 "suggestions": self.generate_smart_suggestions(title)
-            }
+            }, None
             
         # B: Lexical / Phonetic
-        lex_score, lex_reason = self.check_stage_b_lexical_phonetic(title)
+        lex_score, lex_reason = self.check_stage_b_lexical_phonetic(title, choices)
         if lex_score == 100:
             return {
                 "probability": 0, 
@@ -199,14 +409,79 @@ class TitleChecker:
                 "stages": {"B": lex_reason},
                 "top_k_matches": [{"title": title, "score": 100, "stage": "Exact Match"}],
                 "suggestions": self.generate_smart_suggestions(title)
-            }
-            
+            }, None
+
+        # B (Hindi): Devanagari / transliteration
+        hindi_score, hindi_reason = self.check_stage_b_hindi_lexical(title, hindi_title)
+        if hindi_score == 100:
+            return {
+                "probability": 0,
+                "confidence_bucket": "High Risk",
+                "approved": False,
+                "reason": hindi_reason,
+                "stages": {"B-Hindi": hindi_reason},
+                "top_k_matches": [{"title": hindi_title, "score": 100, "stage": "Exact Hindi Match"}],
+                "suggestions": self.generate_smart_suggestions(title)
+            }, None
+
+        return None, (hard_reason, lex_score, lex_reason, hindi_score, hindi_reason)
+
+    def verify_batch(self, items, sources=None):
+        """
+        Verifies [(title, hindi_title), ...] in order, sharing one encoder call across the batch.
+        Approvals take effect immediately, so a later row is checked against earlier approved rows.
+        `sources` optionally names each row (see verify).
+        """
+        with self.pinned_bundle():
+            embeddings = self.encode_queries(items) if self.index is not None and items else None
+            return [
+                self.verify(title, hindi_title, embedding=None if embeddings is None else embeddings[i:i + 1],
+                            source=sources[i] if sources else None)
+                for i, (title, hindi_title) in enumerate(items)
+            ]
+
+    def verify(self, title: str, hindi_title: str = "", embedding=None, source: str = None, filters=None,
+               lexical=None, record: bool = True):
+        """
+        Overall Verification Logic (Stage D)
+        `source` is a stable id for the submission (a bulk job row). An approval is stored with
+        its verdict under that id, and verifying the same source again returns the stored verdict
+        instead of matching the title against its own approval.
+        `filters` ({"state": ..., "city": ..., "periodity": ...}) limits Stage C to that partition;
+        hard rules and lexical checks stay registry-wide. Raises ValueError for unknown filters.
+        `lexical` may be passed in when Stages A/B already ran through check_lexical_stages.
+        With record=False an approval is only reported, not registered (as-you-type previews).
+        Every result names the index bundle it was checked against (index_version, index_timestamp).
+        """
+        with self.pinned_bundle() as bundle:
+            result = self._verify(title, hindi_title, embedding, source, filters, lexical, record)
+        result.setdefault("index_version", bundle.version)
+        result.setdefault("index_timestamp", bundle.built_at)
+        return result
+
+    def _verify(self, title: str, hindi_title: str, embedding, source, filters, lexical, record):
+        filters = self.resolve_filters(filters)
+        if source is not None:
+            stored = self.registry.verdict_for(source)
+            if stored is not None:
+                return stored
+
+        # Pick up titles approved by other workers before checking against them
+        self.sync_registry()
+
+        # A, B, B (Hindi): rule and lexical checks; an outright rejection ends here
+        if lexical is None:
+            rejection, lexical = self.check_lexical_stages(title, hindi_title)
+            if rejection is not None:
+                return rejection
+        hard_reason, lex_score, lex_reason, hindi_score, hindi_reason = lexical
+
         # C: Semantic
-        sem_score, sem_reason, top_k_matches = self.check_stage_c_semantic(title, hindi_title)
+        sem_score, sem_reason, top_k_matches = self.check_stage_c_semantic(title, hindi_title, embedding, filters)
         
         # D: Final Scoring
         # S_max = highest similarity (0 to 100)
-        s_max = max(lex_score, sem_score)
+        s_max = max(lex_score, hindi_score, sem_score)
         
         # Determine approval threshold
         # We need the probability of being unique/safe.
@@ -226,16 +501,12 @@ class TitleChecker:
         
         primary_reason = "Title appears unique and compliant."
         if not approved:
-            if lex_score > sem_score:
+            if lex_score >= max(hindi_score, sem_score):
                 primary_reason = lex_reason
+            elif hindi_score >= sem_score:
+                primary_reason = hindi_reason
             else:
                 primary_reason = sem_reason
-        else:
-            # REQUIREMENT 3: The system will track current applications and use them for future reference,
-            # rejecting similar titles submitted later by other users.
-            # Thread-safe update of the in-memory set.
-            with self._titles_lock:
-                self.existing_titles_set.add(title.lower())
 
         # If Lexical hit high, inject it into top_K
         if lex_score > 60:
@@ -244,10 +515,15 @@ class TitleChecker:
             if m:
                 top_k_matches.insert(0, {"title": m.group(1), "score": lex_score, "stage": "Lexical Proxy"})
 
+        if hindi_score > 60:
+            m = re.search(r"'(.*?)'", hindi_reason)
+            if m:
+                top_k_matches.insert(0, {"title": m.group(1), "score": hindi_score, "stage": "Hindi Lexical"})
+
         # Determine Concept Tags
         tags = self.assign_concept_tags(title)
 
-        return {
+        result = {
             "probability": round(probability, 2),
             "confidence_bucket": confidence_bucket,
             "approved": approved,
@@ -255,13 +531,41 @@ class TitleChecker:
             "stages": {
                 "A": hard_reason,
                 "B": f"{lex_reason} (Score: {lex_score}%)",
+                "B-Hindi": f"{hindi_reason} (Score: {hindi_score}%)",
                 "C": f"{sem_reason} (Score: {sem_score:.2f}%)"
             },
             "s_max": round(s_max, 2),
             "top_k_matches": top_k_matches[:5], # limit to 5
             "tags": tags,
-            "suggestions": self.generate_smart_suggestions(title) if not approved else []
+            "suggestions": self.generate_smart_suggestions(title) if not approved else [],
+            "index_version": self.bundle.version,
+            "index_timestamp": self.bundle.built_at
         }
+        if filters:
+            result["filters"] = filters
+
+        if approved and record:
+            # REQUIREMENT 3: The system will track current applications and use them for future reference,
+            # rejecting similar titles submitted later by other users.
+            # The approval is persisted to the shared registry first; if another worker approved the
+            # same title in the meantime, the registry wins and this submission is a duplicate.
+            with self._titles_lock:
+                approval_id = self.registry.record(title, hindi_title, source, result if source else None)
+                # Every live bundle, so a request pinned to an older one still sees it
+                for bundle in list(self._live_bundles):
+                    bundle.add_approval(title, hindi_title, approval_id)
+            if approval_id is None:
+                return {
+                    "probability": 0,
+                    "confidence_bucket": "High Risk",
+                    "approved": False,
+                    "reason": "Exact match found",
+                    "stages": {"B": "Exact match found"},
+                    "top_k_matches": [{"title": title, "score": 100, "stage": "Exact Match"}],
+                    "suggestions": self.generate_smart_suggestions(title)
+                }
+
+        return result
 
     def assign_concept_tags(self, title: str):
         """
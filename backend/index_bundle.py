@@ -0,0 +1,252 @@
+"""
+Versioned, checksummed index bundles and the in-memory structures loaded from them.
+
+build_index.py writes every artefact of a build into its own directory:
+
+    INDEX_DIR/bundles/<version>/
+        titles.index  metadata.pkl  filters.npz  graph/  prefix/  [vectors.npy]  manifest.json
+
+manifest.json records the build time, settings and the size and sha256 of every file.
+INDEX_DIR/CURRENT names the active version and is replaced atomically; workers watch it
+and swap the new bundle in without restarting (see TitleChecker.reload_bundle).
+
+An INDEX_DIR without CURRENT is loaded as a "legacy" bundle from the flat layout used
+before bundles existed.
+"""
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+import weakref
+import faiss
+import numpy as np
+from lexical_index import HindiLexicalIndex
+from metadata_filters import MetadataFilters
+from prefix_index import PrefixIndex
+from similar_graph import SimilarityGraph
+
+INDEX_DIR = os.environ.get("INDEX_DIR", os.path.join(os.path.dirname(__file__), "index"))
+BUNDLES_DIR = os.path.join(INDEX_DIR, "bundles")
+CURRENT_FILE = os.path.join(INDEX_DIR, "CURRENT")
+# Bundles kept on disk after a build, including the active one (for rollback)
+BUNDLE_KEEP = int(os.environ.get("BUNDLE_KEEP", "3"))
+MANIFEST = "manifest.json"
+LEGACY_VERSION = "legacy"
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _bundle_files(bundle_dir):
+    for root, _, names in os.walk(bundle_dir):
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            rel = os.path.relpath(path, bundle_dir).replace(os.sep, "/")
+            if rel != MANIFEST:
+                yield rel, path
+
+
+def _write_atomic(path, text):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def staging_dir():
+    """Fresh directory for a build in progress; publish_bundle turns it into a bundle."""
+    path = os.path.join(BUNDLES_DIR, f".staging-{os.getpid()}-{int(time.time())}")
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    return path
+
+
+def publish_bundle(stage_dir, info: dict):
+    """
+    Checksums the staged files, writes the manifest and renames the directory to its
+    version ("<UTC build time>-<content hash prefix>"). Returns the version.
+    """
+    files = {rel: {"bytes": os.path.getsize(path), "sha256": _sha256(path)} for rel, path in _bundle_files(stage_dir)}
+    content = hashlib.sha256("".join(f"{rel}:{meta['sha256']}" for rel, meta in sorted(files.items())).encode())
+    built_at = time.gmtime()
+    version = f"{time.strftime('%Y%m%dT%H%M%SZ', built_at)}-{content.hexdigest()[:8]}"
+    manifest = dict(info, version=version, built_at=time.strftime("%Y-%m-%dT%H:%M:%SZ", built_at), files=files)
+    with open(os.path.join(stage_dir, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(stage_dir, os.path.join(BUNDLES_DIR, version))
+    return version
+
+
+def read_manifest(version):
+    with open(os.path.join(BUNDLES_DIR, version, MANIFEST), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def verify_bundle(version):
+    """Returns the manifest if every file matches its size and checksum; raises ValueError otherwise."""
+    bundle_dir = os.path.join(BUNDLES_DIR, version)
+    if not os.path.exists(os.path.join(bundle_dir, MANIFEST)):
+        raise ValueError(f"Bundle '{version}' not found")
+    manifest = read_manifest(version)
+    for rel, expected in manifest["files"].items():
+        path = os.path.join(bundle_dir, rel)
+        if not os.path.exists(path) or os.path.getsize(path) != expected["bytes"] or _sha256(path) != expected["sha256"]:
+            raise ValueError(f"Bundle '{version}' is corrupt: {rel} does not match its checksum")
+    return manifest
+
+
+def current_version():
+    """Version named by INDEX_DIR/CURRENT, or None when the index uses the legacy layout."""
+    try:
+        with open(CURRENT_FILE, 'r', encoding='utf-8') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def activate_bundle(version):
+    """Verifies a bundle and points CURRENT at it; watching workers pick it up."""
+    verify_bundle(version)
+    _write_atomic(CURRENT_FILE, version + "\n")
+
+
+def list_bundles():
+    if not os.path.isdir(BUNDLES_DIR):
+        return []
+    versions = [v for v in os.listdir(BUNDLES_DIR) if os.path.exists(os.path.join(BUNDLES_DIR, v, MANIFEST))]
+    return sorted(versions, reverse=True)
+
+
+def prune_bundles(keep=BUNDLE_KEEP):
+    """Deletes the oldest bundles beyond `keep`, never the active one, plus abandoned staging dirs."""
+    active = current_version()
+    for version in [v for v in list_bundles() if v != active][max(0, keep - 1):]:
+        shutil.rmtree(os.path.join(BUNDLES_DIR, version), ignore_errors=True)
+    if os.path.isdir(BUNDLES_DIR):
+        for name in os.listdir(BUNDLES_DIR):
+            path = os.path.join(BUNDLES_DIR, name)
+            if name.startswith(".staging-") and time.time() - os.path.getmtime(path) > 24 * 3600:
+                shutil.rmtree(path, ignore_errors=True)
+
+
+class IndexBundle:
+    """
+    Everything a verification reads that comes from one build: FAISS index, vectors, metadata,
+    title sets and derived lookup structures. Approvals are merged into the title set and
+    Hindi index; `registry_cursor` is the last approval id merged.
+    """
+
+    def __init__(self, bundle_dir: str, version: str, built_at: str):
+        self.path = bundle_dir
+        self.version = version
+        self.built_at = built_at
+        self.registry_cursor = 0
+        self._approved = set()
+
+        # Load FAISS index
+        faiss_path = os.path.join(bundle_dir, "titles.index")
+        if os.path.exists(faiss_path):
+            self.index = faiss.read_index(faiss_path)
+        else:
+            self.index = None
+            print("WARNING: FAISS index not found. Run build_index.py first.")
+
+        # Full-precision vectors, memory-mapped so every worker shares the page cache.
+        # Only consulted when the index stores compressed vectors (see build_index.VECTOR_STORAGE).
+        vectors_path = os.path.join(bundle_dir, "vectors.npy")
+        self.vectors = np.load(vectors_path, mmap_mode='r') if os.path.exists(vectors_path) else None
+        if self.vectors is not None and self.index is not None and self.vectors.shape[0] != self.index.ntotal:
+            print("WARNING: vectors.npy does not match the FAISS index; exact re-ranking disabled.")
+            self.vectors = None
+        self.rerank = self.index is not None and self.vectors is not None and not isinstance(self.index, faiss.IndexFlat)
+
+        # Load Metadata
+        # NOTE: pickle.load is used here for performance on a trusted, locally-generated file.
+        # Do NOT expose the metadata.pkl path to untrusted input.
+        meta_path = os.path.join(bundle_dir, "metadata.pkl")
+        if os.path.exists(meta_path):
+            with open(meta_path, 'rb') as f:
+                self.metadata = pickle.load(f)
+        else:
+            self.metadata = []
+
+        # Extract purely sets for ultra-fast lookup
+        self.existing_titles_set = {str(m['Title Name']).lower() for m in self.metadata if 'Title Name' in m}
+
+        # State / city / periodity codes per indexed row, for filtered Stage C searches
+        self.metadata_filters = MetadataFilters.load(os.path.join(bundle_dir, "filters.npz"))
+        if self.metadata_filters is not None and self.index is not None and self.metadata_filters.ntotal != self.index.ntotal:
+            print("WARNING: filters.npz does not match the FAISS index; filtered search disabled.")
+            self.metadata_filters = None
+
+        # Precomputed near-duplicate graph over the metadata rows (see similar_graph.py)
+        self.similar_graph = SimilarityGraph.load(os.path.join(bundle_dir, "graph"))
+        if self.similar_graph is not None and len(self.similar_graph) != len(self.metadata):
+            print("WARNING: near-duplicate graph does not match metadata.pkl; rebuild the index.")
+            self.similar_graph = None
+        self.title_code_rows = {}
+        for row, m in enumerate(self.metadata):
+            if m.get('Title-Code'):
+                self.title_code_rows.setdefault(m['Title-Code'], []).append(row)
+
+        # Devanagari exact/fuzzy and transliteration lookups for the Hindi side of the registry
+        self.hindi_index = HindiLexicalIndex()
+        for m in self.metadata:
+            self.hindi_index.add(m.get('Title Name', ''), m.get('Hindi Title', ''))
+
+        # Sorted English / Hindi title keys for type-ahead (see prefix_index.py)
+        self.prefix_index = PrefixIndex.load(os.path.join(bundle_dir, "prefix"))
+        if self.prefix_index is None:
+            self.prefix_index = PrefixIndex.from_titles([m.get('Title Name', '') for m in self.metadata],
+                                                        [m.get('Hindi Title', '') for m in self.metadata])
+
+        # Mapped arrays and the FAISS index are released once the last in-flight request
+        # pinned to this bundle finishes; log it so a leaked reference shows up.
+        weakref.finalize(self, print, f"Index bundle {version} released")
+
+    @classmethod
+    def load(cls, version=None):
+        """
+        Loads `version` (default: the one named by CURRENT) after checking its checksums,
+        or the legacy flat layout when no bundle has been activated.
+        """
+        version = version or current_version()
+        if version is None:
+            faiss_path = os.path.join(INDEX_DIR, "titles.index")
+            stamp = os.path.getmtime(faiss_path) if os.path.exists(faiss_path) else time.time()
+            return cls(INDEX_DIR, LEGACY_VERSION, time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(stamp)))
+        manifest = verify_bundle(version)
+        return cls(os.path.join(BUNDLES_DIR, version), version, manifest["built_at"])
+
+    def add_approval(self, title: str, hindi_title: str, approval_id: int = None):
+        """Merges one approval. Caller holds TitleChecker._titles_lock."""
+        self._add_title(title, hindi_title)
+        # Skip re-reading this row on the next catch-up. Only safe when no other
+        # worker's approval sits between the cursor and this id.
+        if approval_id is not None and approval_id == self.registry_cursor + 1:
+            self.registry_cursor = approval_id
+
+    def merge_approvals(self, rows):
+        """Applies [(id, title, hindi_title), ...] from the registry, skipping rows already merged."""
+        for row_id, title, hindi_title in rows:
+            if row_id > self.registry_cursor:
+                self._add_title(title, hindi_title)
+                self.registry_cursor = row_id
+
+    def _add_title(self, title: str, hindi_title: str):
+        # An approval can be merged twice (recorded here, then read back from the registry)
+        if (title, hindi_title) in self._approved:
+            return
+        self._approved.add((title, hindi_title))
+        self.existing_titles_set.add(title.lower())
+        self.hindi_index.add(title, hindi_title)
+        self.prefix_index.add(title, hindi_title)
@@ -0,0 +1,282 @@
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from rapidfuzz import fuzz
+
+# ---------------------------------------------------------------------------
+# Devanagari normalisation
+# ---------------------------------------------------------------------------
+
+# Zero-width joiners are common in registry data (e.g. "राष्‍ट्रीय") but carry no meaning for matching
+_ZERO_WIDTH = dict.fromkeys(map(ord, "\u200b\u200c\u200d\ufeff"), None)
+_NUKTA = "\u093c"
+_CHANDRABINDU = "\u0901"
+_ANUSVARA = "\u0902"
+_VIRAMA = "\u094d"
+_DEVANAGARI_RE = re.compile(r'[\u0900-\u097f]')
+# Anything that is not a Devanagari letter/sign, a Latin letter or a digit is treated as a separator.
+# Dandas (U+0964/U+0965) and the abbreviation sign live inside the Devanagari block, so exclude them explicitly.
+_SEPARATOR_RE = re.compile(r'[^\u0900-\u0963\u0966-\u096f\u0971-\u097fa-z0-9]+')
+
+# Below this many code points a single shared word already scores ~77 by ratio
+# ("न्यूज" vs "सब न्यूज"), so fuzzy matches involving a short title need a higher score.
+SHORT_TITLE_CHARS = 8
+SHORT_TITLE_SCORE_CUTOFF = 85
+
+
+def has_devanagari(text: str) -> bool:
+    return bool(_DEVANAGARI_RE.search(text or ""))
+
+
+def normalize_devanagari(text: str) -> str:
+    """
+    Canonical form for comparing Hindi titles: NFD-decomposed so that nukta forms
+    (क़ / क + ़) compare equal, nukta dropped, chandrabindu folded into anusvara,
+    zero-width characters and punctuation removed, then recomposed to NFC.
+    """
+    if not text:
+        return ""
+    text = unicodedata.normalize('NFD', str(text)).translate(_ZERO_WIDTH).lower()
+    text = text.replace(_NUKTA, "").replace(_CHANDRABINDU, _ANUSVARA)
+    text = _SEPARATOR_RE.sub(' ', text)
+    return unicodedata.normalize('NFC', " ".join(text.split()))
+
+# ---------------------------------------------------------------------------
+# Transliteration (Devanagari -> Latin) and cross-script phonetic keys
+# ---------------------------------------------------------------------------
+
+_CONSONANTS = {
+    'क': 'k', 'ख': 'kh', 'ग': 'g', 'घ': 'gh', 'ङ': 'n',
+    'च': 'ch', 'छ': 'chh', 'ज': 'j', 'झ': 'jh', 'ञ': 'n',
+    'ट': 't', 'ठ': 'th', 'ड': 'd', 'ढ': 'dh', 'ण': 'n',
+    'त': 't', 'थ': 'th', 'द': 'd', 'ध': 'dh', 'न': 'n',
+    'प': 'p', 'फ': 'ph', 'ब': 'b', 'भ': 'bh', 'म': 'm',
+    'य': 'y', 'र': 'r', 'ल': 'l', 'ळ': 'l', 'व': 'v',
+    'श': 'sh', 'ष': 'sh', 'स': 's', 'ह': 'h',
+}
+_VOWELS = {
+    'अ': 'a', 'आ': 'aa', 'इ': 'i', 'ई': 'ee', 'उ': 'u', 'ऊ': 'oo', 'ऋ': 'ri',
+    'ए': 'e', 'ऐ': 'ai', 'ओ': 'o', 'औ': 'au', 'ऑ': 'o', 'ऍ': 'e',
+}
+_MATRAS = {
+    'ा': 'aa', 'ि': 'i', 'ी': 'ee', 'ु': 'u', 'ू': 'oo', 'ृ': 'ri',
+    'े': 'e', 'ै': 'ai', 'ो': 'o', 'ौ': 'au', 'ॉ': 'o', 'ॅ': 'e',
+}
+_SIGNS = {_ANUSVARA: 'n', 'ः': 'h'}
+_DIGITS = {chr(0x0966 + d): str(d) for d in range(10)}
+
+
+def romanize(text: str) -> str:
+    """
+    Lightweight Devanagari -> Latin transliteration in the informal style used by the
+    English half of the registry ("दैनिक जागरण" -> "dainik jaagaran").
+    The inherent 'a' is dropped at the end of a word; Latin input passes through lower-cased.
+    """
+    out = []
+    for word in normalize_devanagari(text).split():
+        chars = []
+        pending_schwa = False
+        for ch in word:
+            if ch in _CONSONANTS:
+                if pending_schwa:
+                    chars.append('a')
+                chars.append(_CONSONANTS[ch])
+                pending_schwa = True
+                continue
+            if ch in _MATRAS:
+                chars.append(_MATRAS[ch])
+            elif ch == _VIRAMA:
+                pass
+            elif pending_schwa and ch in _SIGNS:
+                chars.append('a')
+                chars.append(_SIGNS[ch])
+            else:
+                chars.append(_VOWELS.get(ch) or _SIGNS.get(ch) or _DIGITS.get(ch) or ch)
+            pending_schwa = False
+        out.append("".join(chars))
+    return " ".join(out)
+
+
+# Ordered: longer digraphs first so "chh" is folded before "ch"
+_PHONETIC_FOLDS = [
+    ('chh', 'c'), ('ch', 'c'), ('ph', 'f'), ('kh', 'k'), ('gh', 'g'), ('jh', 'j'),
+    ('th', 't'), ('dh', 'd'), ('bh', 'b'), ('sh', 's'),
+    ('w', 'v'), ('z', 'j'), ('q', 'k'), ('x', 'ks'),
+    ('ee', 'i'), ('oo', 'u'), ('aa', 'a'),
+]
+
+
+def loose_spelling(text: str) -> str:
+    """Romanised, digraph-folded spelling used to score transliteration matches."""
+    text = romanize(text)
+    for src, dst in _PHONETIC_FOLDS:
+        text = text.replace(src, dst)
+    return text
+
+
+def phonetic_key(text: str) -> str:
+    """
+    Script-independent key: the consonant skeleton of each word of the loose spelling,
+    keeping only a leading vowel. "Dainik Jagran" and "दैनिक जागरण" both map to "dnk jgrn".
+    """
+    words = []
+    for word in loose_spelling(text).split():
+        skeleton = [word[0]]
+        for ch in word[1:]:
+            # Vowels are unreliable across spellings, and so are non-initial y/h (glides, aspiration)
+            if ch in "aeiouyh" or ch == skeleton[-1]:
+                continue
+            skeleton.append(ch)
+        words.append("".join(skeleton))
+    return " ".join(words)
+
+# ---------------------------------------------------------------------------
+# Candidate indexes
+# ---------------------------------------------------------------------------
+
+class NgramIndex:
+    """
+    Character n-gram inverted index used to shortlist fuzzy-match candidates
+    instead of scoring every string in the registry.
+    """
+
+    def __init__(self, n=3, max_postings=5000):
+        self.n = n
+        # Grams shared by more than this many strings carry little signal and are skipped
+        self.max_postings = max_postings
+        self.strings = []
+        self._postings = defaultdict(list)
+
+    def grams(self, text: str):
+        padded = f" {text} "
+        if len(padded) <= self.n:
+            return {padded}
+        return {padded[i:i + self.n] for i in range(len(padded) - self.n + 1)}
+
+    def add(self, text: str) -> int:
+        doc_id = len(self.strings)
+        self.strings.append(text)
+        for gram in self.grams(text):
+            self._postings[gram].append(doc_id)
+        return doc_id
+
+    def candidates(self, text: str, limit=50):
+        """Returns up to `limit` ids sharing the most n-grams with text."""
+        postings = [self._postings[g] for g in self.grams(text) if g in self._postings]
+        selective = [p for p in postings if len(p) <= self.max_postings]
+        counts = Counter()
+        for p in (selective or postings):
+            counts.update(p)
+        return [doc_id for doc_id, _ in counts.most_common(limit)]
+
+    def best_match(self, text: str, score_cutoff=75, limit=50, short_length=0, short_cutoff=None):
+        """
+        Returns (doc_id, score) of the closest string by rapidfuzz ratio, or (None, 0).
+        Pairs where either string is shorter than `short_length` must reach `short_cutoff` instead.
+        """
+        best_id, best_score = None, 0
+        for doc_id in self.candidates(text, limit):
+            candidate = self.strings[doc_id]
+            cutoff = score_cutoff
+            if short_cutoff is not None and min(len(text), len(candidate)) < short_length:
+                cutoff = max(score_cutoff, short_cutoff)
+            score = fuzz.ratio(text, candidate, score_cutoff=cutoff)
+            if score > best_score:
+                best_id, best_score = doc_id, score
+        return best_id, best_score
+
+
+class HindiLexicalIndex:
+    """
+    Stage B lookups for the Hindi side of the registry:
+      * exact match on normalised Devanagari,
+      * fuzzy match on normalised Devanagari via an n-gram candidate index,
+      * transliteration match via a romanised phonetic key shared by both scripts,
+        so that "दैनिक जागरण" collides with an existing English "DAINIK JAGRAN".
+    """
+
+    def __init__(self, score_cutoff=75):
+        self.score_cutoff = score_cutoff
+        self.titles = []                    # English title per entry, for reporting
+        self.hindi_titles = []              # Original Hindi title per entry
+        self._exact = {}                    # normalised Hindi -> entry id
+        self._devanagari = NgramIndex()     # doc id -> entry id via _devanagari_owner
+        self._devanagari_owner = []
+        self._keys = defaultdict(list)      # phonetic key -> [(entry id, loose spelling, source)]
+        self._seen = set()
+
+    def __len__(self):
+        return len(self.titles)
+
+    def add(self, title: str, hindi_title: str = ""):
+        """Adds one registry entry. Re-adding the same (title, hindi_title) pair is a no-op."""
+        title = str(title or "").strip().lower()
+        hindi_norm = normalize_devanagari(hindi_title)
+        if (title, hindi_norm) in self._seen:
+            return
+        self._seen.add((title, hindi_norm))
+
+        entry_id = len(self.titles)
+        self.titles.append(title)
+        self.hindi_titles.append(str(hindi_title or "").strip())
+
+        if hindi_norm:
+            self._exact.setdefault(hindi_norm, entry_id)
+            self._devanagari.add(hindi_norm)
+            self._devanagari_owner.append(entry_id)
+            self._add_key(hindi_norm, entry_id, 'hi')
+        if title:
+            self._add_key(title, entry_id, 'en')
+
+    def _add_key(self, text, entry_id, source):
+        key = phonetic_key(text)
+        if key:
+            self._keys[key].append((entry_id, loose_spelling(text), source))
+
+    def _label(self, entry_id):
+        hindi = self.hindi_titles[entry_id]
+        title = self.titles[entry_id].title()
+        return f"{title} / {hindi}" if hindi else title
+
+    def search(self, title: str, hindi_title: str = ""):
+        """
+        Returns (score 0-100, reason) for the strongest Hindi or cross-script match.
+        A score of 100 means the normalised Hindi title already exists.
+        """
+        best_score, best_reason = 0, ""
+        hindi_norm = normalize_devanagari(hindi_title)
+
+        if hindi_norm:
+            entry_id = self._exact.get(hindi_norm)
+            if entry_id is not None:
+                return 100, f"Hindi title matches existing '{self._label(entry_id)}'"
+
+            doc_id, score = self._devanagari.best_match(
+                hindi_norm, self.score_cutoff, short_length=SHORT_TITLE_CHARS, short_cutoff=SHORT_TITLE_SCORE_CUTOFF
+            )
+            if doc_id is not None and score > best_score:
+                best_score = score
+                best_reason = f"Hindi title very similar to '{self._label(self._devanagari_owner[doc_id])}'"
+
+        # Cross-script: the Hindi title against existing English spellings, and the
+        # English title against existing Hindi spellings (English-English is Stage B proper).
+        probes = []
+        if hindi_norm:
+            probes.append((hindi_norm, ('en', 'hi')))
+        if title and not has_devanagari(title):
+            probes.append((title, ('hi',)))
+
+        for text, sources in probes:
+            query = loose_spelling(text)
+            for entry_id, spelling, source in self._keys.get(phonetic_key(text), ()):
+                if source not in sources:
+                    continue
+                # Capped below 100: that score is reserved for an exact Devanagari match
+                score = min(fuzz.ratio(query, spelling, score_cutoff=self.score_cutoff), 99)
+                if score > best_score:
+                    best_score = score
+                    best_reason = f"Transliteration matches existing '{self._label(entry_id)}'"
+
+        if best_score:
+            return round(best_score, 2), best_reason
+        return 0, "No strong Hindi or transliteration matches"
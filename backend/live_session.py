@@ -0,0 +1,232 @@
+"""
+As-you-type verification over a WebSocket (/verify/live).
+
+The client sends one JSON message per edit: {"seq": 7, "title": "...", "hindi_title": "...",
+"state": ..., "city": ..., "periodity": ...}. A session verifies at most one input at a time
+and only ever the newest one. Inputs that arrive while it is busy replace each other, so
+they are never processed. Every input that is processed gets two messages:
+
+    {"seq": 7, "phase": "lexical", ...}  Stages A / B / B (Hindi): no encoder call
+    {"seq": 7, "phase": "final", ...}    the /verify result, once Stage C has run
+
+An outright rejection from Stages A/B is final at once. Otherwise Stage C waits until the
+input has been left alone for LIVE_SEMANTIC_DELAY_MS, and is skipped (no final message) if a
+newer input arrives first, so the encoder runs when the user pauses rather than on every key.
+Previews are never registered as approvals; submitting still goes through POST /verify.
+
+Per-session state reused between keystrokes:
+  - Lexical candidates. The fuzzy Stage B scan over every registered title is run for an
+    anchor string, keeping each title that can still reach the Stage B cutoff for any input
+    within LIVE_LEXICAL_SLACK edits of the anchor. Indel distance is a metric, so nearby inputs
+    only need to scan that shortlist, and they get the same verdict as a full scan.
+  - Final results for recent inputs, so backspacing to an earlier input costs nothing.
+Both are dropped when the index bundle or the set of registered titles changes.
+"""
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from rapidfuzz import process
+from rapidfuzz.distance import Indel
+from checker import LEXICAL_SCORE_CUTOFF
+
+# Edits (insertions + deletions) from the anchor that can reuse its lexical shortlist
+LIVE_LEXICAL_SLACK = int(os.environ.get("LIVE_LEXICAL_SLACK", "3"))
+# Pause after an input before its Stage C runs; a keystroke inside the window cancels it
+LIVE_SEMANTIC_DELAY_MS = float(os.environ.get("LIVE_SEMANTIC_DELAY_MS", "250"))
+# Final results remembered per session
+LIVE_RESULT_CACHE_SIZE = 32
+FILTER_FIELDS = ("state", "city", "periodity")
+
+
+class LiveSession:
+    """State of one as-you-type connection. `lineage(result, elapsed)` decorates final results."""
+
+    def __init__(self, checker, lineage=None):
+        self.checker = checker
+        self.lineage = lineage
+        self._anchor = None  # (registry key, anchor string, shortlist)
+        self._results = OrderedDict()
+        self.stats = {
+            "inputs": 0,            # messages received
+            "superseded": 0,        # replaced by a newer input before processing started
+            "lexical_runs": 0,
+            "semantic_runs": 0,     # encoder + FAISS searches
+            "semantic_skipped": 0,  # newer input arrived before Stage C started
+            "cache_hits": 0,
+            "full_scans": 0,        # Stage B scans over every registered title
+            "titles_scanned": 0,    # titles compared by Stage B fuzzy matching
+        }
+
+    def _registry_key(self, bundle):
+        # The title set only grows, so its size changes whenever an approval is merged
+        return bundle.version, id(bundle), len(bundle.existing_titles_set)
+
+    def lexical_choices(self, title_lower: str, bundle):
+        """Titles that can score >= LEXICAL_SCORE_CUTOFF against `title_lower` in Stage B, in set order."""
+        titles = bundle.existing_titles_set
+        if title_lower in titles:
+            return titles  # Stage B stops at the exact match before scanning
+        key = self._registry_key(bundle)
+        if self._anchor is not None and self._anchor[0] == key and \
+                Indel.distance(self._anchor[1], title_lower, score_cutoff=LIVE_LEXICAL_SLACK) <= LIVE_LEXICAL_SLACK:
+            self.stats["titles_scanned"] += len(self._anchor[2])
+            return self._anchor[2]
+
+        # ratio(q, t) >= c  <=>  indel(q, t) <= f * (|q| + |t|), with f = 1 - c / 100.
+        # For any q within k edits of the anchor a: indel(a, t) <= f * (|a| + |t|) + (1 + f) * k,
+        # and ratio >= c also needs |t| <= |q| * (200 / c - 1).
+        f = 1 - LEXICAL_SCORE_CUTOFF / 100
+        k = LIVE_LEXICAL_SLACK
+        max_length = (len(title_lower) + k) * (200 / LEXICAL_SCORE_CUTOFF - 1)
+        cutoff = int(f * (len(title_lower) + max_length) + (1 + f) * k)
+        hits = process.extract(title_lower, titles, scorer=Indel.distance, score_cutoff=cutoff, limit=None)
+        shortlist = [
+            (position, choice) for choice, distance, position in hits
+            if len(choice) <= max_length and distance <= f * (len(title_lower) + len(choice)) + (1 + f) * k
+        ]
+        # Keep existing_titles_set's iteration order so ties resolve exactly as in a full scan
+        shortlist = [choice for _, choice in sorted(shortlist)]
+        self._anchor = (key, title_lower, shortlist)
+        self.stats["full_scans"] += 1
+        self.stats["titles_scanned"] += len(titles)
+        return shortlist
+
+    def _result_key(self, request, bundle):
+        return (request["title"], request["hindi_title"], tuple(sorted(request["filters"].items())),
+                self._registry_key(bundle))
+
+    def lexical_phase(self, request):
+        """
+        Runs Stages A/B for a parsed request. Returns (bundle, message, lexical): `lexical` is
+        None when `message` is already final (a rejection or a cached result).
+        """
+        checker = self.checker
+        with checker.pinned_bundle() as bundle:
+            request["filters"] = checker.resolve_filters(request["filters"])
+            checker.sync_registry()
+            cached = self._results.get(self._result_key(request, bundle))
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                return bundle, dict(cached), None
+
+            self.stats["lexical_runs"] += 1
+            t0 = time.time()
+            choices = self.lexical_choices(request["title"].lower(), bundle)
+            rejection, lexical = checker.check_lexical_stages(request["title"], request["hindi_title"], choices)
+            if rejection is not None:
+                rejection.update(index_version=bundle.version, index_timestamp=bundle.built_at)
+                return bundle, self._finish(request, bundle, rejection, time.time() - t0), None
+
+            hard_reason, lex_score, lex_reason, hindi_score, hindi_reason = lexical
+            message = {
+                "phase": "lexical",
+                "stages": {
+                    "A": hard_reason,
+                    "B": f"{lex_reason} (Score: {lex_score}%)",
+                    "B-Hindi": f"{hindi_reason} (Score: {hindi_score}%)",
+                },
+                "s_max": round(max(lex_score, hindi_score), 2),
+                "index_version": bundle.version,
+            }
+            return bundle, message, lexical
+
+    def semantic_phase(self, request, bundle, lexical):
+        """Stage C and final scoring on the bundle the lexical phase used. Nothing is registered."""
+        self.stats["semantic_runs"] += 1
+        t0 = time.time()
+        with self.checker.pinned_bundle(bundle):
+            result = self.checker.verify(request["title"], request["hindi_title"], filters=request["filters"],
+                                         lexical=lexical, record=False)
+        return self._finish(request, bundle, result, time.time() - t0)
+
+    def _finish(self, request, bundle, result, elapsed):
+        if self.lineage is not None:
+            result = self.lineage(result, elapsed)
+        result["phase"] = "final"
+        self._results[self._result_key(request, bundle)] = result
+        if len(self._results) > LIVE_RESULT_CACHE_SIZE:
+            self._results.popitem(last=False)
+        return dict(result)
+
+    @staticmethod
+    def parse(message):
+        """Validates one decoded client message; returns None for an empty title (nothing to check)."""
+        if not isinstance(message, dict):
+            raise ValueError("Expected a JSON object.")
+        title = str(message.get("title") or "").strip()
+        if not title:
+            return None
+        return {
+            "seq": message.get("seq"),
+            "title": title,
+            "hindi_title": str(message.get("hindi_title") or "").strip(),
+            "filters": {field: message.get(field) for field in FILTER_FIELDS},
+        }
+
+    async def serve(self, receive, send):
+        """
+        Runs the session until `receive` raises (the client disconnected). `receive` returns
+        one raw text message and `send` takes a JSON-serialisable dict. Messages are read
+        continuously; the newest unprocessed one replaces any older one still waiting.
+        """
+        pending = None
+        arrived = asyncio.Event()
+
+        async def reader():
+            nonlocal pending
+            while True:
+                message = await receive()
+                self.stats["inputs"] += 1
+                if pending is not None:
+                    self.stats["superseded"] += 1
+                pending = message
+                arrived.set()
+
+        async def superseded(delay=0.0):
+            """True once a newer input arrives (or the client leaves), waiting up to `delay` seconds."""
+            if delay and pending is None and not reader_task.done():
+                try:
+                    await asyncio.wait_for(arrived.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+            return pending is not None or reader_task.done()
+
+        reader_task = asyncio.create_task(reader())
+        try:
+            while True:
+                waiter = asyncio.create_task(arrived.wait())
+                await asyncio.wait({waiter, reader_task}, return_when=asyncio.FIRST_COMPLETED)
+                if reader_task.done():
+                    waiter.cancel()
+                    reader_task.result()  # re-raises the disconnect
+                    return
+                arrived.clear()
+                message, pending = pending, None
+                await self._process(message, send, superseded)
+        finally:
+            reader_task.cancel()
+
+    async def _process(self, text, send, superseded):
+        seq = None
+        try:
+            message = json.loads(text)
+            seq = message.get("seq") if isinstance(message, dict) else None
+            request = self.parse(message)
+            if request is None:
+                return
+            bundle, reply, lexical = await asyncio.to_thread(self.lexical_phase, request)
+        except ValueError as e:
+            await send({"seq": seq, "phase": "error", "detail": str(e)})
+            return
+
+        await send(dict(reply, seq=seq, title=request["title"]))
+        if lexical is None:
+            return
+        if await superseded(LIVE_SEMANTIC_DELAY_MS / 1e3):
+            # The user kept typing: this input's Stage C would be stale on arrival
+            self.stats["semantic_skipped"] += 1
+            return
+        result = await asyncio.to_thread(self.semantic_phase, request, bundle, lexical)
+        await send(dict(result, seq=seq, title=request["title"]))
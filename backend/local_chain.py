@@ -0,0 +1,170 @@
+"""
+In-process stand-in for blockchain/TitleRegistry.sol, used to exercise the Merkle
+batcher end-to-end and to estimate gas without running a node.
+
+It mirrors the contract's storage layout, access control and require() checks, and
+meters gas with the post-London schedule: EIP-2929 cold/warm storage access, EIP-2200
+SSTORE pricing (refunds ignored), calldata and LOG costs, and the keccak256 used to
+derive mapping/array slots. Stack, memory and ABI-decoding opcodes are covered by a flat
+per-call allowance, so totals are estimates rather than exact receipts.
+"""
+import time
+from merkle import keccak256, leaf_hash, hash_pair
+
+TX_BASE_GAS = 21000
+CALLDATA_ZERO_BYTE_GAS = 4
+CALLDATA_NONZERO_BYTE_GAS = 16
+COLD_SLOAD_GAS = 2100
+WARM_ACCESS_GAS = 100
+SSTORE_SET_GAS = 20000
+SSTORE_RESET_GAS = 2900
+LOG_GAS = 375
+LOG_TOPIC_GAS = 375
+LOG_DATA_BYTE_GAS = 8
+KECCAK_GAS = 30
+KECCAK_WORD_GAS = 6
+EXECUTION_ALLOWANCE_GAS = 800
+
+_SELECTORS = {
+    "registerTitle": keccak256(b"registerTitle(bytes32)")[:4],
+    "registerBatch": keccak256(b"registerBatch(bytes32,uint256)")[:4],
+}
+
+
+class ContractRevert(Exception):
+    """Raised when a call would revert on-chain (failed require / onlyOwner)."""
+
+
+class _GasMeter:
+    def __init__(self, storage, calldata: bytes):
+        self.storage = storage
+        self.original = {}
+        self.warm = set()
+        self.gas = TX_BASE_GAS + EXECUTION_ALLOWANCE_GAS + sum(
+            CALLDATA_ZERO_BYTE_GAS if b == 0 else CALLDATA_NONZERO_BYTE_GAS for b in calldata
+        )
+
+    def _touch(self, slot):
+        if slot in self.warm:
+            return WARM_ACCESS_GAS
+        self.warm.add(slot)
+        self.original[slot] = self.storage.get(slot, 0)
+        return COLD_SLOAD_GAS
+
+    def sload(self, slot):
+        self.gas += self._touch(slot)
+        return self.storage.get(slot, 0)
+
+    def sstore(self, slot, value):
+        cold = slot not in self.warm
+        self.gas += COLD_SLOAD_GAS if cold else 0
+        self._touch(slot)
+        current = self.storage.get(slot, 0)
+        if value == current or self.original[slot] != current:
+            self.gas += WARM_ACCESS_GAS
+        elif current == 0:
+            self.gas += SSTORE_SET_GAS
+        else:
+            self.gas += SSTORE_RESET_GAS
+        self.storage[slot] = value
+
+    def keccak(self, words):
+        self.gas += KECCAK_GAS + KECCAK_WORD_GAS * words
+
+    def log(self, topics, data_bytes):
+        self.gas += LOG_GAS + LOG_TOPIC_GAS * topics + LOG_DATA_BYTE_GAS * data_bytes
+
+
+class LocalTitleRegistry:
+    """Python mirror of TitleRegistry.sol with per-transaction gas accounting."""
+
+    def __init__(self, owner: str = "0x" + "11" * 20):
+        self.owner = owner
+        self.storage = {("owner",): owner}
+        self.block_number = 0
+        self.receipts = []
+
+    def _transaction(self, name, args):
+        calldata = _SELECTORS[name] + b"".join(args)
+        meter = _GasMeter(self.storage, calldata)
+        self.block_number += 1
+        return meter, calldata
+
+    def _receipt(self, meter, calldata, sender, event):
+        receipt = {
+            "tx_hash": "0x" + keccak256(calldata + self.block_number.to_bytes(8, 'big')).hex(),
+            "block_number": self.block_number,
+            "from": sender,
+            "gas_used": meter.gas,
+            "event": event,
+        }
+        self.receipts.append(receipt)
+        return receipt
+
+    def _only_owner(self, meter, sender):
+        if meter.sload(("owner",)) != sender:
+            raise ContractRevert("TitleRegistry: caller is not the owner")
+
+    def register_title(self, title_hash: bytes, sender: str = None):
+        sender = sender or self.owner
+        meter, calldata = self._transaction("registerTitle", [title_hash])
+        self._only_owner(meter, sender)
+        if title_hash == bytes(32):
+            raise ContractRevert("TitleRegistry: title hash cannot be zero")
+
+        meter.keccak(2)
+        if meter.sload(("isRegistered", title_hash)):
+            raise ContractRevert("Title is already registered on the blockchain.")
+        meter.sstore(("isRegistered", title_hash), 1)
+
+        # registryLog.push: length slot, then the three struct slots at keccak(slot) + 3 * length
+        length = meter.sload(("registryLog.length",))
+        meter.keccak(1)
+        timestamp = int(time.time())
+        meter.sstore(("registryLog", length, "titleHash"), title_hash)
+        meter.sstore(("registryLog", length, "timestamp"), timestamp)
+        meter.sstore(("registryLog", length, "submitter"), sender)
+        meter.sstore(("registryLog.length",), length + 1)
+
+        meter.log(topics=3, data_bytes=32)
+        return self._receipt(meter, calldata, sender, ("TitleVerified", title_hash, sender, timestamp))
+
+    def register_batch(self, root: bytes, count: int, sender: str = None):
+        sender = sender or self.owner
+        meter, calldata = self._transaction("registerBatch", [root, count.to_bytes(32, 'big')])
+        self._only_owner(meter, sender)
+        if root == bytes(32):
+            raise ContractRevert("TitleRegistry: batch root cannot be zero")
+        if not 0 < count <= 0xFFFFFFFF:
+            raise ContractRevert("TitleRegistry: invalid batch size")
+
+        meter.keccak(2)
+        if meter.sload(("batches", root)):
+            raise ContractRevert("Batch is already registered on the blockchain.")
+        timestamp = int(time.time())
+        # BatchRecord packs count, timestamp and submitter into one slot
+        meter.sstore(("batches", root), (count, timestamp, sender))
+        total = meter.sload(("totalBatchedTitles",))
+        meter.sstore(("totalBatchedTitles",), total + count)
+
+        meter.log(topics=2, data_bytes=64)
+        return self._receipt(meter, calldata, sender, ("BatchRegistered", root, count, timestamp))
+
+    # --- view functions (eth_call, no gas charged) ---
+
+    def is_registered(self, title_hash: bytes) -> bool:
+        return bool(self.storage.get(("isRegistered", title_hash)))
+
+    def is_batch_registered(self, root: bytes) -> bool:
+        return bool(self.storage.get(("batches", root)))
+
+    def is_batched_title(self, title_hash: bytes, root: bytes, proof) -> bool:
+        if not self.is_batch_registered(root):
+            return False
+        node = leaf_hash(title_hash)
+        for sibling in proof:
+            node = hash_pair(node, sibling)
+        return node == root
+
+    def get_total_titles(self) -> int:
+        return self.storage.get(("registryLog.length",), 0) + self.storage.get(("totalBatchedTitles",), 0)
@@ -0,0 +1,139 @@
+"""
+Keccak-256 and Merkle tree helpers matching TitleRegistry.sol.
+
+Leaves are keccak256(titleHash), where titleHash = keccak256(utf8(title.lower().strip()))
+is the same per-title hash the frontend registers. Hashing the leaf a second time keeps
+an internal node from ever being passed off as a title. Internal nodes hash the sorted
+pair of children, so a proof is just the list of siblings; an odd node at the end of a
+level is promoted unchanged.
+"""
+
+try:
+    # pycryptodome, if installed, is far faster than the pure-Python fallback below
+    from Crypto.Hash import keccak as _crypto_keccak
+except ImportError:
+    _crypto_keccak = None
+
+_MASK = (1 << 64) - 1
+_ROUND_CONSTANTS = [
+    0x0000000000000001, 0x0000000000008082, 0x800000000000808A, 0x8000000080008000,
+    0x000000000000808B, 0x0000000080000001, 0x8000000080008081, 0x8000000000008009,
+    0x000000000000008A, 0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089, 0x8000000000008003,
+    0x8000000000008002, 0x8000000000000080, 0x000000000000800A, 0x800000008000000A,
+    0x8000000080008081, 0x8000000000008080, 0x0000000080000001, 0x8000000080008008,
+]
+# Rotation offsets, indexed x + 5 * y
+_ROTATIONS = [
+    0, 1, 62, 28, 27,
+    36, 44, 6, 55, 20,
+    3, 10, 43, 25, 39,
+    41, 45, 15, 21, 8,
+    18, 2, 61, 56, 14,
+]
+_RATE = 136  # bytes, for a 256-bit output
+
+
+# rho + pi as (source lane, destination lane, rotation) and chi neighbours, precomputed per lane
+_RHO_PI = [(x + 5 * y, y + 5 * ((2 * x + 3 * y) % 5), _ROTATIONS[x + 5 * y]) for x in range(5) for y in range(5)]
+_CHI = [(i, (i % 5 + 1) % 5 + 5 * (i // 5), (i % 5 + 2) % 5 + 5 * (i // 5)) for i in range(25)]
+
+
+def _keccak_f(lanes):
+    for rc in _ROUND_CONSTANTS:
+        # theta
+        c = [lanes[x] ^ lanes[x + 5] ^ lanes[x + 10] ^ lanes[x + 15] ^ lanes[x + 20] for x in range(5)]
+        d = [c[(x - 1) % 5] ^ (((c[(x + 1) % 5] << 1) | (c[(x + 1) % 5] >> 63)) & _MASK) for x in range(5)]
+        lanes = [lanes[i] ^ d[i % 5] for i in range(25)]
+        # rho + pi
+        b = [0] * 25
+        for src, dst, rot in _RHO_PI:
+            v = lanes[src]
+            b[dst] = ((v << rot) | (v >> (64 - rot))) & _MASK if rot else v
+        # chi
+        lanes = [b[i] ^ (~b[j] & b[k]) for i, j, k in _CHI]
+        # iota
+        lanes[0] ^= rc
+    return lanes
+
+
+def keccak256(data: bytes) -> bytes:
+    """Ethereum's Keccak-256 (original Keccak padding, not NIST SHA3-256)."""
+    if _crypto_keccak is not None:
+        return _crypto_keccak.new(digest_bits=256, data=data).digest()
+
+    padded = bytearray(data)
+    padded.append(0x01)
+    padded.extend(b"\x00" * (-len(padded) % _RATE))
+    padded[-1] |= 0x80
+
+    lanes = [0] * 25
+    for offset in range(0, len(padded), _RATE):
+        block = padded[offset:offset + _RATE]
+        for i in range(_RATE // 8):
+            lanes[i] ^= int.from_bytes(block[8 * i:8 * i + 8], 'little')
+        lanes = _keccak_f(lanes)
+    return b"".join(lane.to_bytes(8, 'little') for lane in lanes[:4])
+
+
+def title_hash(title: str) -> bytes:
+    """Same hash the frontend computes: keccak256(toUtf8Bytes(title.toLowerCase().trim()))."""
+    return keccak256(title.strip().lower().encode('utf-8'))
+
+
+def leaf_hash(title_hash_bytes: bytes) -> bytes:
+    return keccak256(title_hash_bytes)
+
+
+def hash_pair(a: bytes, b: bytes) -> bytes:
+    return keccak256(a + b) if a < b else keccak256(b + a)
+
+
+def level_sizes(count: int):
+    sizes = [count]
+    while sizes[-1] > 1:
+        sizes.append((sizes[-1] + 1) // 2)
+    return sizes
+
+
+def build_tree(leaves):
+    """
+    Builds the tree bottom-up and returns it as one flat bytes blob: every level
+    concatenated, leaves first, 32 bytes per node. The root is the last 32 bytes.
+    """
+    if not leaves:
+        raise ValueError("Cannot build a Merkle tree with no leaves")
+    level = list(leaves)
+    levels = [level]
+    while len(level) > 1:
+        level = [hash_pair(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+                 for i in range(0, len(level), 2)]
+        levels.append(level)
+    return b"".join(node for lvl in levels for node in lvl)
+
+
+def tree_root(tree: bytes) -> bytes:
+    return tree[-32:]
+
+
+def inclusion_proof(tree: bytes, count: int, position: int):
+    """Sibling hashes from leaf `position` up to the root of a tree made by build_tree."""
+    if not 0 <= position < count:
+        raise IndexError(f"Leaf position {position} out of range for {count} leaves")
+    proof = []
+    offset = 0
+    for size in level_sizes(count)[:-1]:
+        sibling = position ^ 1
+        if sibling < size:
+            start = (offset + sibling) * 32
+            proof.append(tree[start:start + 32])
+        offset += size
+        position //= 2
+    return proof
+
+
+def verify_proof(leaf: bytes, proof, root: bytes) -> bool:
+    node = leaf
+    for sibling in proof:
+        node = hash_pair(node, sibling)
+    return node == root
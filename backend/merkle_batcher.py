@@ -0,0 +1,259 @@
+"""
+Batching service that commits approved titles on-chain as one Merkle root per batch.
+
+Runs as a single standalone process next to the API workers:
+
+    python merkle_batcher.py
+
+It tails the shared approvals registry (registry.db), cuts a batch once BATCH_MAX_SIZE
+approvals are pending or the oldest pending approval is BATCH_WINDOW_SECONDS old, and
+calls TitleRegistry.registerBatch(root, count). Each batch's full tree is stored next to
+the approvals so the API can serve inclusion proofs (GET /titles/proof).
+
+Without CHAIN_RPC_URL it refuses to start. `python merkle_batcher.py --dry-run` batches a
+snapshot copy of the registry against the in-process LocalTitleRegistry instead; the real
+registry.db is never written, so dry-run roots can't be served as committed proofs.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from merkle import build_tree, tree_root, inclusion_proof, leaf_hash, title_hash
+from registry_store import ApprovalStore
+
+INDEX_DIR = os.environ.get("INDEX_DIR", os.path.join(os.path.dirname(__file__), "index"))
+REGISTRY_DB = os.environ.get("REGISTRY_DB", os.path.join(INDEX_DIR, "registry.db"))
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", "1000"))
+BATCH_WINDOW_SECONDS = float(os.environ.get("BATCH_WINDOW_SECONDS", "300"))
+BATCH_POLL_SECONDS = float(os.environ.get("BATCH_POLL_SECONDS", "5"))
+
+
+class BatchStore(ApprovalStore):
+    """Approvals registry plus the committed Merkle batches over it."""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS batches ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " root TEXT NOT NULL UNIQUE,"
+                " first_approval_id INTEGER NOT NULL,"
+                " last_approval_id INTEGER NOT NULL,"
+                " count INTEGER NOT NULL,"
+                " tree BLOB NOT NULL,"
+                " tx_hash TEXT,"
+                " committed_at REAL NOT NULL,"
+                " confirmed INTEGER NOT NULL DEFAULT 1)"
+            )
+            # A batch row is written before its transaction is sent and confirmed afterwards,
+            # so a restart resubmits exactly the range it had already cut. Batches stored
+            # before the column existed were all confirmed.
+            self._add_columns("batches", [("confirmed", "INTEGER NOT NULL DEFAULT 1")])
+
+    def pending(self, limit: int):
+        """Oldest approvals not yet in a batch: [(id, title_key, approved_at), ...]."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, title_key, approved_at FROM approvals"
+                " WHERE id > (SELECT COALESCE(MAX(last_approval_id), 0) FROM batches)"
+                " ORDER BY id LIMIT ?",
+                (limit,),
+            ).fetchall()
+
+    def save_batch(self, root: bytes, first_id: int, last_id: int, count: int, tree: bytes) -> int:
+        """Records a batch about to be submitted. Returns its id; confirm_batch marks it committed."""
+        with self._lock:
+            return self._conn.execute(
+                "INSERT INTO batches (root, first_approval_id, last_approval_id, count, tree, committed_at, confirmed)"
+                " VALUES (?, ?, ?, ?, ?, ?, 0)",
+                ("0x" + root.hex(), first_id, last_id, count, tree, time.time()),
+            ).lastrowid
+
+    def confirm_batch(self, batch_id: int, tx_hash):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE batches SET confirmed = 1, tx_hash = ?, committed_at = ? WHERE id = ?",
+                (tx_hash, time.time(), batch_id),
+            )
+
+    def unconfirmed_batch(self):
+        """The batch left unconfirmed by a crash, as (id, root, count), or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, root, count FROM batches WHERE confirmed = 0 ORDER BY id LIMIT 1"
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], bytes.fromhex(row[1][2:]), row[2]
+
+    def proof_for(self, title: str):
+        """
+        Returns the inclusion proof for an approved title, a {"status": "pending"} record
+        if it has not been batched yet, or None if the title was never approved.
+        """
+        key = title.strip().lower()
+        with self._lock:
+            row = self._conn.execute("SELECT id FROM approvals WHERE title_key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            approval_id = row[0]
+            batch = self._conn.execute(
+                "SELECT id, root, first_approval_id, count, tree, tx_hash, committed_at FROM batches"
+                " WHERE first_approval_id <= ? AND last_approval_id >= ? AND confirmed = 1",
+                (approval_id, approval_id),
+            ).fetchone()
+            if batch is None:
+                return {"status": "pending", "title_hash": "0x" + title_hash(key).hex()}
+            batch_id, root, first_id, count, tree, tx_hash, committed_at = batch
+            # Leaves are ordered by approval id within the batch
+            position = self._conn.execute(
+                "SELECT COUNT(*) FROM approvals WHERE id >= ? AND id < ?", (first_id, approval_id)
+            ).fetchone()[0]
+
+        th = title_hash(key)
+        return {
+            "status": "committed",
+            "title_hash": "0x" + th.hex(),
+            "leaf": "0x" + leaf_hash(th).hex(),
+            "batch_id": batch_id,
+            "root": root,
+            "batch_size": count,
+            "position": position,
+            "proof": ["0x" + node.hex() for node in inclusion_proof(tree, count, position)],
+            "tx_hash": tx_hash,
+            "committed_at": committed_at,
+        }
+
+
+class MerkleBatcher:
+    """Cuts pending approvals into batches and commits each batch root to the registry contract."""
+
+    def __init__(self, store: BatchStore, chain, max_size=BATCH_MAX_SIZE, window_seconds=BATCH_WINDOW_SECONDS):
+        self.store = store
+        self.chain = chain
+        self.max_size = max_size
+        self.window_seconds = window_seconds
+
+    def poll(self, force=False):
+        """Commits one batch if the size or time window is reached. Returns the receipt, or None."""
+        t0 = time.time()
+        unconfirmed = self.store.unconfirmed_batch()
+        if unconfirmed is not None:
+            # Cut before a crash: finish that exact range, whatever has been approved since
+            batch_id, root, count = unconfirmed
+            print(f"Resuming unconfirmed batch {batch_id} of {count} titles, root 0x{root.hex()[:16]}...")
+        else:
+            pending = self.store.pending(self.max_size)
+            if not pending:
+                return None
+            if not force and len(pending) < self.max_size and time.time() - pending[0][2] < self.window_seconds:
+                return None
+            count = len(pending)
+            tree = build_tree([leaf_hash(title_hash(key)) for _, key, _ in pending])
+            root = tree_root(tree)
+            # Persisted before submitting, so the root on-chain always has a matching row
+            batch_id = self.store.save_batch(root, pending[0][0], pending[-1][0], count, tree)
+
+        if self.chain.is_batch_registered(root):
+            # The transaction landed before the crash; its hash was never recorded
+            receipt = {"tx_hash": None, "gas_used": 0}
+        else:
+            receipt = self.chain.register_batch(root, count)
+        self.store.confirm_batch(batch_id, receipt["tx_hash"])
+        receipt = dict(receipt, count=count)
+
+        print(f"Committed batch of {count} titles, root 0x{root.hex()[:16]}..., "
+              f"gas {receipt['gas_used']} ({receipt['gas_used'] / count:.1f}/title), "
+              f"in {time.time() - t0:.2f}s")
+        return receipt
+
+    def run_forever(self, poll_seconds=BATCH_POLL_SECONDS):
+        print(f"Merkle batcher running: up to {self.max_size} titles or {self.window_seconds:.0f}s per batch.")
+        while True:
+            # Drain full batches back-to-back, then wait for more approvals
+            if self.poll() is None:
+                time.sleep(poll_seconds)
+
+
+class Web3Registry:
+    """Submits batches to a deployed TitleRegistry over JSON-RPC (requires the `web3` package)."""
+
+    ABI = [
+        {"name": "registerBatch", "type": "function", "stateMutability": "nonpayable", "outputs": [],
+         "inputs": [{"name": "_root", "type": "bytes32"}, {"name": "_count", "type": "uint256"}]},
+        {"name": "batches", "type": "function", "stateMutability": "view",
+         "inputs": [{"name": "", "type": "bytes32"}],
+         "outputs": [{"name": "count", "type": "uint32"}, {"name": "timestamp", "type": "uint64"},
+                     {"name": "submitter", "type": "address"}]},
+    ]
+
+    def __init__(self, rpc_url: str, contract_address: str, private_key: str):
+        from web3 import Web3
+        self.w3 = Web3(Web3.HTTPProvider(rpc_url))
+        self.account = self.w3.eth.account.from_key(private_key)
+        self.contract = self.w3.eth.contract(address=Web3.to_checksum_address(contract_address), abi=self.ABI)
+
+    def is_batch_registered(self, root: bytes) -> bool:
+        return self.contract.functions.batches(root).call()[1] != 0
+
+    def register_batch(self, root: bytes, count: int):
+        tx = self.contract.functions.registerBatch(root, count).build_transaction({
+            "from": self.account.address,
+            "nonce": self.w3.eth.get_transaction_count(self.account.address),
+        })
+        signed = self.account.sign_transaction(tx)
+        raw = getattr(signed, "raw_transaction", None) or signed.rawTransaction
+        receipt = self.w3.eth.wait_for_transaction_receipt(self.w3.eth.send_raw_transaction(raw))
+        if receipt["status"] != 1:
+            raise RuntimeError(f"registerBatch reverted in tx {receipt['transactionHash'].hex()}")
+        return {"tx_hash": receipt["transactionHash"].hex(), "gas_used": receipt["gasUsed"]}
+
+
+def dry_run(path: str, max_size=BATCH_MAX_SIZE):
+    """
+    Batches everything pending in a snapshot of the registry against LocalTitleRegistry
+    and reports the gas. The snapshot is discarded afterwards.
+    """
+    from local_chain import LocalTitleRegistry
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_path = os.path.join(tmp, "registry.db")
+        source, snapshot = sqlite3.connect(path), sqlite3.connect(snapshot_path)
+        try:
+            source.backup(snapshot)
+        finally:
+            source.close()
+            snapshot.close()
+
+        store = BatchStore(snapshot_path)
+        batcher = MerkleBatcher(store, LocalTitleRegistry(), max_size=max_size)
+        batches = titles = gas = 0
+        while True:
+            receipt = batcher.poll(force=True)
+            if receipt is None:
+                break
+            batches += 1
+            titles += receipt["count"]
+            gas += receipt["gas_used"]
+        store.close()
+    if batches:
+        print(f"Dry run: {titles} titles in {batches} batch(es), {gas} gas ({gas / titles:.1f}/title). "
+              f"{path} was not modified.")
+    else:
+        print("Dry run: no approvals pending.")
+
+
+if __name__ == "__main__":
+    if "--dry-run" in sys.argv[1:]:
+        dry_run(REGISTRY_DB)
+    elif not os.environ.get("CHAIN_RPC_URL"):
+        sys.exit("CHAIN_RPC_URL is not set. Set CHAIN_RPC_URL, CHAIN_CONTRACT_ADDRESS and CHAIN_PRIVATE_KEY, "
+                 "or run with --dry-run to batch a snapshot of the registry against LocalTitleRegistry.")
+    else:
+        chain = Web3Registry(
+            os.environ["CHAIN_RPC_URL"],
+            os.environ["CHAIN_CONTRACT_ADDRESS"],
+            os.environ["CHAIN_PRIVATE_KEY"],
+        )
+        MerkleBatcher(BatchStore(REGISTRY_DB), chain).run_forever()
@@ -0,0 +1,108 @@
+"""
+Compact categorical columns used to restrict semantic search to a State,
+Publication City/District or Periodity.
+
+build_index.py dictionary-encodes each column into the smallest integer type that
+fits (int8 / int16 / int32 codes plus the sorted distinct values) and writes them to
+INDEX_DIR/filters.npz, row-aligned with the FAISS index. At query time a filter becomes
+a row mask, which is packed into a FAISS IDSelectorBitmap.
+"""
+import os
+import threading
+from collections import OrderedDict
+import faiss
+import numpy as np
+import pandas as pd
+
+# Request field -> dataset column
+FILTER_COLUMNS = {
+    "state": "State",
+    "city": "Publication City/District",
+    "periodity": "Periodity",
+}
+# Distinct filter combinations whose row ids and bitmaps are kept per worker
+SELECTOR_CACHE_SIZE = 64
+
+
+def normalize_value(value) -> str:
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return ""
+    return " ".join(str(value).split()).upper()
+
+
+def _code_dtype(cardinality: int):
+    for dtype in (np.int8, np.int16, np.int32):
+        if cardinality <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def save_filter_columns(df, path: str):
+    """Writes the categorical columns of `df` (one row per indexed vector) to `path`."""
+    arrays = {}
+    for field, column in FILTER_COLUMNS.items():
+        codes, values = pd.factorize(df[column].map(normalize_value), sort=True)
+        arrays[f"{field}_codes"] = codes.astype(_code_dtype(len(values)))
+        arrays[f"{field}_values"] = np.array(values, dtype=str)
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+
+class MetadataFilters:
+    """Row masks and FAISS selectors for {field: value} filters over the indexed rows."""
+
+    def __init__(self, path: str):
+        with np.load(path, allow_pickle=False) as data:
+            self.codes = {field: data[f"{field}_codes"] for field in FILTER_COLUMNS}
+            self.values = {field: data[f"{field}_values"].tolist() for field in FILTER_COLUMNS}
+        self._lookup = {field: {v: i for i, v in enumerate(values)} for field, values in self.values.items()}
+        self.ntotal = len(self.codes["state"])
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str):
+        """Returns the filters, or None if the index was built without filters.npz."""
+        return cls(path) if os.path.exists(path) else None
+
+    def resolve(self, filters):
+        """
+        Normalises {field: value}, dropping empty values. Raises ValueError for an unknown
+        field or a value that never occurs in the registry.
+        """
+        resolved = {}
+        for field, value in (filters or {}).items():
+            if field not in FILTER_COLUMNS:
+                raise ValueError(f"Unknown filter '{field}' (expected one of: {', '.join(FILTER_COLUMNS)})")
+            value = normalize_value(value)
+            if not value:
+                continue
+            if value not in self._lookup[field]:
+                raise ValueError(f"No registered titles with {FILTER_COLUMNS[field]} '{value}'")
+            resolved[field] = value
+        return resolved
+
+    def selection(self, filters):
+        """
+        (sorted row ids, IDSelectorBitmap) for resolved filters, cached per combination.
+        The packed bitmap is returned alongside the selector, which only holds a pointer to it.
+        """
+        key = tuple(sorted(filters.items()))
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        mask = np.ones(self.ntotal, dtype=bool)
+        for field, value in filters.items():
+            mask &= self.codes[field] == self._lookup[field][value]
+        ids = np.flatnonzero(mask)
+        bits = np.packbits(mask, bitorder='little')
+        entry = (ids, faiss.IDSelectorBitmap(self.ntotal, faiss.swig_ptr(bits)), bits)
+
+        with self._cache_lock:
+            self._cache[key] = entry
+            if len(self._cache) > SELECTOR_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return entry
@@ -0,0 +1,154 @@
+"""
+Type-ahead over registered titles: every English and Hindi title that starts with a prefix.
+
+Titles are normalised with normalize_devanagari (lower case, punctuation and zero-width
+characters removed, nukta / chandrabindu folded), encoded as UTF-8 and sorted bytewise.
+build_index.py stores the sorted keys in the bundle's prefix/ directory:
+
+    keys.bin     all keys concatenated, in sorted order
+    offsets.npy  int64 [m + 1]  key i is keys.bin[offsets[i]:offsets[i + 1]]
+    rows.npy     int32 [m]      metadata row of key i
+
+The files are memory-mapped, so workers share one copy through the page cache. A lookup costs
+one binary search for the prefix plus a galloping search past each distinct key returned, so
+O(log m + limit * log r) where r is how often a title repeats.
+Titles approved after the build go into a small sorted list in memory and are merged in at query time.
+"""
+import bisect
+import heapq
+import mmap
+import os
+from itertools import groupby, islice
+from operator import itemgetter
+import numpy as np
+from lexical_index import normalize_devanagari
+
+
+def title_keys(title: str, hindi_title: str = ""):
+    """Distinct normalised UTF-8 keys for a title pair (English first)."""
+    keys = []
+    for text in (title, hindi_title):
+        key = normalize_devanagari(text).encode('utf-8')
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+def build_prefix_arrays(titles, hindi_titles):
+    """(keys blob, offsets, rows) for metadata rows, sorted bytewise by key."""
+    entries = sorted(
+        (key, row)
+        for row, (title, hindi_title) in enumerate(zip(titles, hindi_titles))
+        for key in title_keys(title, hindi_title)
+    )
+    offsets = np.zeros(len(entries) + 1, np.int64)
+    np.cumsum([len(key) for key, _ in entries], out=offsets[1:])
+    rows = np.array([row for _, row in entries], np.int32)
+    return b"".join(key for key, _ in entries), offsets, rows
+
+
+def save_prefix_index(titles, hindi_titles, prefix_dir: str):
+    """Builds the prefix arrays for metadata rows and writes them to `prefix_dir`."""
+    blob, offsets, rows = build_prefix_arrays(titles, hindi_titles)
+    os.makedirs(prefix_dir, exist_ok=True)
+    with open(os.path.join(prefix_dir, "keys.bin"), 'wb') as f:
+        f.write(blob)
+    np.save(os.path.join(prefix_dir, "offsets.npy"), offsets)
+    np.save(os.path.join(prefix_dir, "rows.npy"), rows)
+    return len(rows)
+
+
+class PrefixIndex:
+    """
+    Sorted-key prefix search. Rows >= 0 are metadata rows; titles added at runtime are
+    returned as negative rows, -1 - i for `added[i]` = (title, hindi_title).
+    """
+
+    def __init__(self, blob, offsets, rows):
+        self._keys = blob
+        self._offsets = offsets
+        self._rows = rows
+        self.size = len(rows)
+        self.added = []
+        self._added_keys = []  # sorted [(key, row), ...] for titles added at runtime
+
+    @classmethod
+    def load(cls, prefix_dir: str):
+        """Memory-maps the arrays written by save_prefix_index, or returns None if absent."""
+        keys_path = os.path.join(prefix_dir, "keys.bin")
+        if not os.path.exists(keys_path):
+            return None
+        blob = b""
+        if os.path.getsize(keys_path):
+            with open(keys_path, 'rb') as f:
+                blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(blob, np.load(os.path.join(prefix_dir, "offsets.npy"), mmap_mode='r'),
+                   np.load(os.path.join(prefix_dir, "rows.npy"), mmap_mode='r'))
+
+    @classmethod
+    def from_titles(cls, titles, hindi_titles):
+        """Builds the index in memory, for bundles written before prefix/ existed."""
+        return cls(*build_prefix_arrays(titles, hindi_titles))
+
+    def __len__(self):
+        return self.size + len(self._added_keys)
+
+    def _key(self, i: int) -> bytes:
+        return self._keys[int(self._offsets[i]):int(self._offsets[i + 1])]
+
+    def _lower_bound(self, target: bytes, lo: int = 0, hi: int = None) -> int:
+        hi = self.size if hi is None else hi
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def add(self, title: str, hindi_title: str = ""):
+        """Indexes a title approved after the build. Caller serialises writers."""
+        row = -1 - len(self.added)
+        self.added.append((title, hindi_title))
+        for key in title_keys(title, hindi_title):
+            bisect.insort(self._added_keys, (key, row))
+
+    def _base_matches(self, prefix: bytes):
+        """(key, first row, rows with that key) per distinct key, skipping repeats by binary search."""
+        i = self._lower_bound(prefix)
+        while i < self.size:
+            key = self._key(i)
+            if not key.startswith(prefix):
+                return
+            # Keys never contain NUL, so key + NUL sorts right after every copy of key.
+            # Gallop from i first: most keys occur once or twice.
+            after, step = key + b"\0", 1
+            while i + step < self.size and self._key(i + step) < after:
+                step *= 2
+            end = self._lower_bound(after, i + step // 2, min(i + step, self.size))
+            yield key, int(self._rows[i]), end - i
+            i = end
+
+    def _added_matches(self, prefix: bytes):
+        added = self._added_keys
+        i = bisect.bisect_left(added, (prefix,))
+        while i < len(added) and added[i][0].startswith(prefix):
+            yield added[i][0], added[i][1], 1
+            i += 1
+
+    def complete(self, text: str, limit: int = 10):
+        """
+        Up to `limit` distinct keys starting with the normalised `text`, in key order, as
+        (key, first row, number of rows with that key).
+        """
+        prefix = normalize_devanagari(text).encode('utf-8')
+        if not prefix or limit <= 0:
+            return []
+        if text[-1].isspace():
+            prefix += b" "  # a finished word only completes to titles with more words
+        matches = heapq.merge(self._base_matches(prefix), self._added_matches(prefix))
+        result = []
+        for key, group in islice(groupby(matches, key=itemgetter(0)), limit):
+            group = list(group)
+            result.append((key.decode('utf-8'), group[0][1], sum(count for _, _, count in group)))
+        return result
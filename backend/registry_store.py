@@ -0,0 +1,110 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+class ApprovalStore:
+    """
+    Durable registry of approved titles, shared by every worker process on the host.
+
+    Backed by SQLite in WAL mode: readers never block the single writer, and commits
+    with synchronous=NORMAL do not fsync, which keeps the approval path well under a
+    millisecond while still surviving a process crash. Ids are assigned in commit order,
+    so each worker can tail the table with `WHERE id > last_seen` instead of rescanning it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # isolation_level=None: every statement commits on its own, no implicit transactions
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._data_version = None
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            # source identifies the bulk job row that produced an approval ("<job_id>:<row>"),
+            # and verdict is the result returned for it, so a resumed job can replay it.
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS approvals ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " title TEXT NOT NULL,"
+                " title_key TEXT NOT NULL UNIQUE,"
+                " hindi_title TEXT NOT NULL DEFAULT '',"
+                " approved_at REAL NOT NULL,"
+                " source TEXT,"
+                " verdict TEXT)"
+            )
+            # Registries created before bulk jobs lack the two columns
+            self._add_columns("approvals", [("source", "TEXT"), ("verdict", "TEXT")])
+            self._conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS approvals_source ON approvals (source)")
+
+    def _add_columns(self, table: str, columns):
+        """
+        Adds [(name, declaration), ...] missing from `table`. Every worker runs this at startup,
+        so the check and the ALTERs share one write transaction: a worker that loses the race
+        waits for the lock, then finds the columns already there.
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            existing = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+            for name, declaration in columns:
+                if name not in existing:
+                    self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {declaration}")
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def record(self, title: str, hindi_title: str = "", source: str = None, verdict: dict = None):
+        """
+        Persists an approval and returns its id. Returns None if the title was already
+        approved, possibly by another worker since this one last caught up.
+        """
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO approvals (title, title_key, hindi_title, approved_at, source, verdict)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (title, title.strip().lower(), hindi_title or "", time.time(), source,
+                 json.dumps(verdict, ensure_ascii=False) if verdict is not None else None),
+            )
+            return cur.lastrowid if cur.rowcount == 1 else None
+
+    def verdict_for(self, source: str):
+        """The verdict stored with the approval recorded for `source`, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT verdict FROM approvals WHERE source = ?", (source,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def changes_since(self, last_id: int):
+        """
+        Returns [(id, title, hindi_title), ...] for approvals with id > last_id.
+        Skips the query entirely when no other connection has committed since the last call.
+        """
+        with self._lock:
+            # data_version only changes when *another* connection commits; this
+            # worker's own approvals are applied in memory as they are recorded.
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if version == self._data_version:
+                return []
+            self._data_version = version
+            return self._rows_since(last_id)
+
+    def rows_since(self, last_id: int):
+        """Like changes_since, but always queries; used to catch a freshly loaded index up."""
+        with self._lock:
+            return self._rows_since(last_id)
+
+    def _rows_since(self, last_id: int):
+        return self._conn.execute(
+            "SELECT id, title, hindi_title FROM approvals WHERE id > ? ORDER BY id",
+            (last_id,),
+        ).fetchall()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM approvals").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,247 @@
+"""
+Precomputed near-duplicate graph of the registry.
+
+build_index.py links every pair of titles that is semantically close (cosine similarity
+at or above SIMILAR_THRESHOLD, found with FAISS range_search) or lexically close (rapidfuzz
+ratio at or above SIMILAR_LEXICAL_CUTOFF on the English title). The graph is stored as a
+CSR adjacency in INDEX_DIR/graph/:
+
+    indptr.npy   int64 [n + 1]  neighbours of row i are indices[indptr[i]:indptr[i + 1]]
+    indices.npy  int32 [2E]     neighbour row ids, strongest first
+    scores.npy   float16 [2E]   max(cosine * 100, lexical ratio)
+    kinds.npy    uint8 [2E]     bitmask of SEMANTIC / LEXICAL
+    stats.json                  degree and cluster statistics for auditing
+
+The arrays are memory-mapped at load time, so every worker shares one copy and a lookup
+reads only the neighbour slice it needs.
+"""
+import json
+import os
+import time
+from collections import defaultdict
+import faiss
+import numpy as np
+from rapidfuzz import fuzz, process
+
+SEMANTIC = 1
+LEXICAL = 2
+_KIND_NAMES = ((SEMANTIC, "semantic"), (LEXICAL, "lexical"))
+
+SIMILAR_THRESHOLD = float(os.environ.get("SIMILAR_THRESHOLD", "0.80"))
+SIMILAR_LEXICAL_CUTOFF = float(os.environ.get("SIMILAR_LEXICAL_CUTOFF", "75"))
+# Clusters are connected components over strong edges only: at the conflict thresholds above,
+# generic words ("times", "jagran") chain most of the registry into one component.
+CLUSTER_MIN_SCORE = float(os.environ.get("CLUSTER_MIN_SCORE", "90"))
+RANGE_BLOCK_SIZE = 65536
+# Scores computed per lexical block (float32: 4 bytes each)
+LEXICAL_BLOCK_CELLS = 16 * 1024 * 1024
+LARGEST_CLUSTERS_REPORTED = 10
+
+
+def semantic_edges(vectors, threshold=SIMILAR_THRESHOLD, block_size=RANGE_BLOCK_SIZE):
+    """
+    All pairs (i < j) of L2-normalised vectors with inner product >= threshold.
+    Only one database block is held in a flat index at a time, and each pair of blocks
+    is searched once (upper triangle), so the memory-mapped matrix is never copied whole.
+    """
+    n, dimension = vectors.shape
+    src, dst, sim = [], [], []
+    for db_start in range(0, n, block_size):
+        db = faiss.IndexFlatIP(dimension)
+        db.add(np.ascontiguousarray(vectors[db_start:db_start + block_size]))
+        for q_start in range(0, db_start + 1, block_size):
+            queries = np.ascontiguousarray(vectors[q_start:q_start + block_size])
+            lims, distances, labels = db.range_search(queries, threshold)
+            rows = np.repeat(np.arange(q_start, q_start + len(queries)), np.diff(lims).astype(np.int64))
+            cols = labels + db_start
+            keep = rows < cols
+            src.append(rows[keep])
+            dst.append(cols[keep])
+            sim.append(distances[keep])
+    if not src:
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.float32)
+    return np.concatenate(src), np.concatenate(dst), np.concatenate(sim) * 100
+
+
+def lexical_edges(titles, score_cutoff=SIMILAR_LEXICAL_CUTOFF, max_cells=LEXICAL_BLOCK_CELLS):
+    """
+    All pairs (i < j) of rows whose titles score >= score_cutoff by rapidfuzz ratio, exhaustively.
+    Distinct titles are sorted by length and scored blockwise with process.cdist against the
+    later titles that can still reach the cutoff: ratio >= c needs the shorter title to be at
+    least c / (200 - c) of the longer one. Each block's score matrix holds at most `max_cells`
+    entries. Rows repeating a title are linked to each other with score 100.
+    """
+    rows_by_title = defaultdict(list)
+    for row, title in enumerate(titles):
+        if title:
+            rows_by_title[title].append(row)
+    unique = sorted(rows_by_title, key=len)
+    lengths = np.array([len(title) for title in unique])
+    length_ratio = score_cutoff / (200 - score_cutoff)
+
+    src, dst, score = [], [], []
+
+    def link(rows_a, rows_b, value):
+        for a in rows_a:
+            for b in rows_b:
+                if a < b or (a > b and rows_a is not rows_b):
+                    src.append(min(a, b))
+                    dst.append(max(a, b))
+                    score.append(value)
+
+    for title in unique:
+        rows = rows_by_title[title]
+        if len(rows) > 1:
+            link(rows, rows, 100.0)
+
+    start = 0
+    while start < len(unique):
+        # Size the block from its first title's candidate span; later titles in it are longer
+        # and reach further, so the span is re-measured from the block's last title.
+        reach = int(np.searchsorted(lengths, lengths[start] / length_ratio, side='right'))
+        end = min(len(unique), start + max(1, max_cells // (reach - start)))
+        reach = int(np.searchsorted(lengths, lengths[end - 1] / length_ratio, side='right'))
+        scores = process.cdist(unique[start:end], unique[start:reach], scorer=fuzz.ratio,
+                               score_cutoff=score_cutoff, dtype=np.float32, workers=-1)
+        for i, j in zip(*np.nonzero(np.triu(scores, k=1))):
+            link(rows_by_title[unique[start + i]], rows_by_title[unique[start + j]], float(scores[i, j]))
+        start = end
+
+    return np.array(src, np.int64), np.array(dst, np.int64), np.array(score, np.float32)
+
+
+def build_graph(n, semantic, lexical):
+    """Merges (src, dst, score) edge lists into a symmetric CSR adjacency, strongest neighbours first."""
+    src = np.concatenate([semantic[0], lexical[0]])
+    dst = np.concatenate([semantic[1], lexical[1]])
+    score = np.concatenate([semantic[2], lexical[2]]).astype(np.float32)
+    kind = np.concatenate([np.full(len(semantic[0]), SEMANTIC, np.uint8), np.full(len(lexical[0]), LEXICAL, np.uint8)])
+
+    # A pair found by both passes becomes one edge: max score, both kinds
+    key = src * n + dst
+    order = np.argsort(key, kind='stable')
+    key, score, kind = key[order], score[order], kind[order]
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]]) if len(key) else np.empty(0, np.int64)
+    if len(starts):
+        score = np.maximum.reduceat(score, starts)
+        kind = np.bitwise_or.reduceat(kind, starts)
+        key = key[starts]
+    src, dst = key // n, key % n
+
+    # Store both directions, ordered by row then descending score
+    rows = np.concatenate([src, dst])
+    cols = np.concatenate([dst, src])
+    score = np.concatenate([score, score])
+    kind = np.concatenate([kind, kind])
+    order = np.lexsort((-score, rows))
+    indptr = np.zeros(n + 1, np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    return indptr, cols[order].astype(np.int32), score[order].astype(np.float16), kind[order]
+
+
+def connected_components(n, indptr, indices, mask=None):
+    """
+    Component label (smallest member row) per row, by min-label propagation with pointer
+    jumping. `mask` optionally selects the edges to follow.
+    """
+    labels = np.arange(n)
+    rows = np.repeat(np.arange(n), np.diff(indptr))
+    indices = np.asarray(indices)
+    if mask is not None:
+        rows, indices = rows[mask], indices[mask]
+    while True:
+        previous = labels.copy()
+        np.minimum.at(labels, rows, labels[indices])
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            return labels
+
+
+def cluster_stats(indptr, indices, scores, kinds, titles, threshold, lexical_cutoff, cluster_min_score=CLUSTER_MIN_SCORE):
+    n = len(indptr) - 1
+    degree = np.diff(indptr)
+    labels = connected_components(n, indptr, indices, np.asarray(scores) >= cluster_min_score)
+    sizes = np.bincount(labels, minlength=n)
+    cluster_ids = np.flatnonzero(sizes > 1)
+    largest = cluster_ids[np.argsort(-sizes[cluster_ids], kind='stable')][:LARGEST_CLUSTERS_REPORTED]
+
+    largest_clusters = []
+    for label in largest:
+        members = np.flatnonzero(labels == label)
+        sample = list(dict.fromkeys(titles[row] for row in members))[:5]
+        largest_clusters.append({"size": int(sizes[label]), "distinct_titles": len(set(titles[r] for r in members)),
+                                 "sample": sample})
+
+    buckets = [(1, 1), (2, 4), (5, 9), (10, 49), (50, None)]
+    histogram = {}
+    for low, high in buckets:
+        mask = degree >= low if high is None else (degree >= low) & (degree <= high)
+        histogram[f"{low}+" if high is None else (f"{low}" if low == high else f"{low}-{high}")] = int(mask.sum())
+
+    return {
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "titles": n,
+        "edges": int(len(indices) // 2),
+        "semantic_edges": int(np.count_nonzero(kinds & SEMANTIC) // 2),
+        "lexical_edges": int(np.count_nonzero(kinds & LEXICAL) // 2),
+        "semantic_threshold": threshold,
+        "lexical_cutoff": lexical_cutoff,
+        "isolated_titles": int(np.count_nonzero(degree == 0)),
+        "mean_degree": round(float(degree.mean()), 2) if n else 0.0,
+        "max_degree": int(degree.max()) if n else 0,
+        "degree_histogram": histogram,
+        "cluster_min_score": cluster_min_score,
+        "clusters": int(len(cluster_ids)),
+        "titles_in_clusters": int(sizes[cluster_ids].sum()),
+        "largest_clusters": largest_clusters,
+    }
+
+
+def build_similarity_graph(vectors, titles, graph_dir, threshold=SIMILAR_THRESHOLD, lexical_cutoff=SIMILAR_LEXICAL_CUTOFF):
+    """Builds and saves the graph for metadata rows `titles` and their vectors. Returns the stats."""
+    t0 = time.time()
+    semantic = semantic_edges(vectors, threshold)
+    print(f"  semantic pass: {len(semantic[0])} pairs at cosine >= {threshold} ({time.time() - t0:.1f}s)")
+    t1 = time.time()
+    lexical = lexical_edges(titles, lexical_cutoff)
+    print(f"  lexical pass: {len(lexical[0])} pairs at ratio >= {lexical_cutoff} ({time.time() - t1:.1f}s)")
+
+    indptr, indices, scores, kinds = build_graph(len(titles), semantic, lexical)
+    stats = cluster_stats(indptr, indices, scores, kinds, titles, threshold, lexical_cutoff)
+
+    os.makedirs(graph_dir, exist_ok=True)
+    for name, array in (("indptr", indptr), ("indices", indices), ("scores", scores), ("kinds", kinds)):
+        np.save(os.path.join(graph_dir, f"{name}.npy"), array)
+    with open(os.path.join(graph_dir, "stats.json"), 'w', encoding='utf-8') as f:
+        json.dump(stats, f, indent=2, ensure_ascii=False)
+    return stats
+
+
+class SimilarityGraph:
+    """Read side of the graph: memory-mapped CSR arrays and the build-time stats."""
+
+    def __init__(self, graph_dir: str):
+        self.indptr = np.load(os.path.join(graph_dir, "indptr.npy"), mmap_mode='r')
+        self.indices = np.load(os.path.join(graph_dir, "indices.npy"), mmap_mode='r')
+        self.scores = np.load(os.path.join(graph_dir, "scores.npy"), mmap_mode='r')
+        self.kinds = np.load(os.path.join(graph_dir, "kinds.npy"), mmap_mode='r')
+        with open(os.path.join(graph_dir, "stats.json"), 'r', encoding='utf-8') as f:
+            self.stats = json.load(f)
+
+    @classmethod
+    def load(cls, graph_dir: str):
+        """Returns the graph, or None if build_index.py has not produced one."""
+        if not os.path.exists(os.path.join(graph_dir, "stats.json")):
+            return None
+        return cls(graph_dir)
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def neighbours(self, row: int):
+        """[(row, score, [kind names]), ...] for one row, strongest first. O(degree)."""
+        start, end = int(self.indptr[row]), int(self.indptr[row + 1])
+        return [
+            (int(col), round(float(score), 2), [name for bit, name in _KIND_NAMES if kind & bit])
+            for col, score, kind in zip(self.indices[start:end], self.scores[start:end], self.kinds[start:end])
+        ]
@@ -6,6 +6,10 @@ pragma solidity ^0.8.0;
  * @dev An immutable audit log for the PRGI Title Verification System.
  * Stores only a keccak256 hash of the title, the timestamp, and the submitter's address.
  * Access-controlled: only the contract owner (PRGI authority) may register titles.
+ *
+ * High-volume registration goes through registerBatch: the backend batches approved
+ * titles into a Merkle tree and commits only the root, one storage slot per batch.
+ * Leaves are keccak256(titleHash) and internal nodes hash the sorted pair of children.
  */
 contract TitleRegistry {
 
@@ -23,7 +27,21 @@ contract TitleRegistry {
     // Array to keep the historical log of all registrations
     TitleRecord[] public registryLog;
 
+    // Packed into a single storage slot (4 + 8 + 20 bytes)
+    struct BatchRecord {
+        uint32 count;
+        uint64 timestamp;
+        address submitter;
+    }
+
+    // Merkle root => batch details; a zero timestamp means the root is unknown
+    mapping(bytes32 => BatchRecord) public batches;
+
+    // Number of titles registered through batches
+    uint256 public totalBatchedTitles;
+
     event TitleVerified(bytes32 indexed titleHash, address indexed submitter, uint256 timestamp);
+    event BatchRegistered(bytes32 indexed root, uint256 count, uint256 timestamp);
     event OwnershipTransferred(address indexed previousOwner, address indexed newOwner);
 
     modifier onlyOwner() {
@@ -69,9 +87,51 @@ contract TitleRegistry {
     }
 
     /**
-     * @dev Retrieves the total number of registered titles.
+     * @dev Registers the Merkle root of a batch of approved title hashes.
+     * Only the contract owner (PRGI authority) may call this.
+     * @param _root The Merkle root over keccak256(titleHash) leaves.
+     * @param _count The number of titles in the batch.
+     */
+    function registerBatch(bytes32 _root, uint256 _count) public onlyOwner {
+        require(_root != bytes32(0), "TitleRegistry: batch root cannot be zero");
+        require(_count > 0 && _count <= type(uint32).max, "TitleRegistry: invalid batch size");
+        require(batches[_root].timestamp == 0, "Batch is already registered on the blockchain.");
+
+        batches[_root] = BatchRecord({
+            count: uint32(_count),
+            timestamp: uint64(block.timestamp),
+            submitter: msg.sender
+        });
+        totalBatchedTitles += _count;
+
+        emit BatchRegistered(_root, _count, block.timestamp);
+    }
+
+    /**
+     * @dev Checks that a title hash is included in a registered batch.
+     * @param _titleHash The keccak256 hash of the title string.
+     * @param _root The Merkle root of the batch.
+     * @param _proof Sibling hashes from the leaf up to the root.
+     */
+    function isBatchedTitle(bytes32 _titleHash, bytes32 _root, bytes32[] calldata _proof) public view returns (bool) {
+        if (batches[_root].timestamp == 0) {
+            return false;
+        }
+
+        bytes32 node = keccak256(abi.encodePacked(_titleHash));
+        for (uint256 i = 0; i < _proof.length; i++) {
+            bytes32 sibling = _proof[i];
+            node = node < sibling
+                ? keccak256(abi.encodePacked(node, sibling))
+                : keccak256(abi.encodePacked(sibling, node));
+        }
+        return node == _root;
+    }
+
+    /**
+     * @dev Retrieves the total number of registered titles, individual and batched.
      */
     function getTotalTitles() public view returns (uint256) {
-        return registryLog.length;
+        return registryLog.length + totalBatchedTitles;
     }
 }
@@ -7,6 +7,7 @@ import { GlassCard } from "@/components/glass-card"
 import { Search, AlertCircle, CheckCircle2, Loader2, Sparkles, Clock, ShieldCheck, FileText, ChevronRight, Link as LinkIcon, CheckCircle } from "lucide-react"
 import { ethers } from "ethers"
 import { useWallet } from "@/context/wallet-context"
+import { useLiveVerification } from "@/hooks/use-live-verification"
 
 interface VerifyResponse {
   approved: boolean
@@ -29,6 +30,7 @@ interface VerifyResponse {
   inference_time_seconds?: number
   model_version?: string
   ruleset_version?: string
+  index_version?: string
   index_timestamp?: string
   title: string
 }
@@ -49,6 +51,8 @@ export function VerificationSection() {
   const [loading, setLoading] = useState(false)
   const [result, setResult] = useState<VerifyResponse | null>(null)
   const [error, setError] = useState("")
+  // As-you-type preview over a WebSocket; "Verify Title" still submits through POST /verify
+  const liveVerdict = useLiveVerification(API_BASE_URL, title, hindiTitle)
 
   // Blockchain State from Context
   const { walletConnected, walletAddress, isConnecting: isConnectingWallet, connectWallet, error: walletError } = useWallet()
@@ -163,6 +167,27 @@ export function VerificationSection() {
                     />
                   </div>
 
+                  {liveVerdict && liveVerdict.phase !== "error" && (
+                    <div className="flex items-center gap-2 text-xs text-muted-foreground">
+                      {liveVerdict.phase === "lexical" ? (
+                        <>
+                          <Loader2 className="h-3 w-3 animate-spin" />
+                          <span>Closest spelling match {liveVerdict.s_max}%, checking meaning…</span>
+                        </>
+                      ) : liveVerdict.approved ? (
+                        <>
+                          <CheckCircle2 className="h-3 w-3 text-emerald-500" />
+                          <span>Looks unique so far ({liveVerdict.probability?.toFixed(1)}%)</span>
+                        </>
+                      ) : (
+                        <>
+                          <AlertCircle className="h-3 w-3 text-destructive" />
+                          <span>{liveVerdict.reason}</span>
+                        </>
+                      )}
+                    </div>
+                  )}
+
                   {error && (
                     <div className="flex items-center gap-2 rounded-lg bg-destructive/10 p-3 text-sm text-destructive border border-destructive/20">
                       <AlertCircle className="h-4 w-4 shrink-0" />
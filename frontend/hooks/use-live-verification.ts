@@ -0,0 +1,51 @@
+import * as React from 'react'
+
+export interface LiveVerdict {
+  seq: number
+  phase: 'lexical' | 'final' | 'error'
+  title?: string
+  approved?: boolean
+  probability?: number
+  confidence_bucket?: string
+  reason?: string
+  s_max?: number
+  stages?: Record<string, string>
+  detail?: string
+}
+
+// Opens one /verify/live WebSocket and sends every edit over it. The server only answers the
+// newest input, so replies for an older seq are dropped here as well.
+export function useLiveVerification(apiBaseUrl: string, title: string, hindiTitle: string) {
+  const [verdict, setVerdict] = React.useState<LiveVerdict | null>(null)
+  const socketRef = React.useRef<WebSocket | null>(null)
+  const seqRef = React.useRef(0)
+
+  React.useEffect(() => {
+    const socket = new WebSocket(`${apiBaseUrl.replace(/^http/, 'ws')}/verify/live`)
+    socket.onmessage = (event) => {
+      const message: LiveVerdict = JSON.parse(event.data)
+      if (message.seq === seqRef.current) {
+        setVerdict(message)
+      }
+    }
+    socketRef.current = socket
+    return () => {
+      socketRef.current = null
+      socket.close()
+    }
+  }, [apiBaseUrl])
+
+  React.useEffect(() => {
+    const seq = ++seqRef.current
+    if (!title.trim()) {
+      setVerdict(null)
+      return
+    }
+    const socket = socketRef.current
+    if (socket?.readyState === WebSocket.OPEN) {
+      socket.send(JSON.stringify({ seq, title: title.trim(), hindi_title: hindiTitle.trim() }))
+    }
+  }, [title, hindiTitle])
+
+  return verdict
+}